@@ -0,0 +1,123 @@
+"""
+Бенчмарк режима --no-cache-pollution (только Linux).
+
+Создаёт большой «сканируемый» файл и «горячий» файл, имитирующий рабочий
+набор соседнего сервиса, и для обычного чтения и чтения с posix_fadvise
+выводит:
+  - скорость хеширования
+  - долю сканируемого файла, оставшуюся в page cache (засорение кэша)
+  - долю горячего файла, оставшуюся в page cache
+
+Резидентность страниц считается через mincore(2).
+Вытеснение горячего набора заметно только при нехватке памяти, поэтому
+для показательного результата размер сканируемого файла стоит брать
+больше свободной RAM (или запускать в cgroup с ограничением памяти).
+
+    python benchmarks/bench_fadvise.py --size 2G --hot 256M
+"""
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import mmap
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from file_hash_validator.hashing import calculate  # noqa: E402
+from file_hash_validator.models import HashAlgo  # noqa: E402
+from file_hash_validator.throttle import parse_rate  # noqa: E402
+
+_libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+_PAGE = mmap.PAGESIZE
+
+
+def residency(path: Path) -> float:
+    """Доля страниц файла, находящихся в page cache."""
+    size = path.stat().st_size
+    if size == 0:
+        return 0.0
+    with open(path, "rb") as f:
+        # ACCESS_COPY — приватное отображение: страницы не подгружаются,
+        # а буфер доступен на запись (нужно для ctypes.from_buffer)
+        mm = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_COPY)
+        try:
+            pages = (size + _PAGE - 1) // _PAGE
+            vec = (ctypes.c_ubyte * pages)()
+            addr = ctypes.c_char.from_buffer(mm)
+            buf = ctypes.addressof(addr)
+            if _libc.mincore(ctypes.c_void_p(buf), ctypes.c_size_t(size), vec) != 0:
+                raise OSError(ctypes.get_errno(), "mincore")
+            del addr
+            return sum(v & 1 for v in vec) / pages
+        finally:
+            mm.close()
+
+
+def drop_cache(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def write_file(path: Path, size: int) -> None:
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        left = size
+        while left > 0:
+            f.write(block[:min(left, len(block))])
+            left -= len(block)
+    drop_cache(path)
+
+
+def warm(path: Path) -> None:
+    with open(path, "rb") as f:
+        while f.read(1024 * 1024):
+            pass
+
+
+def run(scan: Path, hot: Path, no_cache: bool) -> None:
+    drop_cache(scan)
+    warm(hot)
+    start = time.perf_counter()
+    calculate(scan, HashAlgo.SHA256, no_cache=no_cache)
+    elapsed = time.perf_counter() - start
+    speed = scan.stat().st_size / elapsed / 1024 / 1024
+    mode = "no-cache-pollution" if no_cache else "обычный"
+    print(f"{mode:>20}: {speed:8.1f} MiB/s | в кэше: скан "
+          f"{residency(scan) * 100:5.1f}%, горячий набор {residency(hot) * 100:5.1f}%")
+
+
+def main() -> int:
+    if not hasattr(os, "posix_fadvise"):
+        print("posix_fadvise недоступен на этой платформе")
+        return 2
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--size", type=parse_rate, default=parse_rate("512M"),
+                        help="Размер сканируемого файла (по умолчанию 512M).")
+    parser.add_argument("--hot", type=parse_rate, default=parse_rate("64M"),
+                        help="Размер горячего набора (по умолчанию 64M).")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help="Каталог для временных файлов.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        scan, hot = Path(tmp, "scan.bin"), Path(tmp, "hot.bin")
+        write_file(scan, int(args.size))
+        write_file(hot, int(args.hot))
+        for no_cache in (False, True):
+            run(scan, hot, no_cache)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+"""
+Бенчмарк --workers (потоки) и coordinate --processes (процессы).
+
+Создаёт дерево файлов одного размера и для разного числа потоков
+(check_entries(workers=N)) и локальных процессов (coordinate) выводит
+скорость проверки в файлах/с и MiB/с. Файлы читаются из page cache,
+поэтому измеряется накладной расход на файл, а не скорость диска.
+
+Потоки упираются в GIL на маленьких файлах: Python-код на каждый файл
+выполняется по очереди, параллельно идёт только хеширование крупных
+chunk'ов (hashlib отпускает GIL). Процессы GIL не делят, но платят
+за запуск и передачу заданий по TCP.
+
+    python benchmarks/bench_workers.py --files 20000 --size 1K
+    python benchmarks/bench_workers.py --files 200 --size 4M
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from file_hash_validator.checker import check_entries  # noqa: E402
+from file_hash_validator.distributed import coordinate  # noqa: E402
+from file_hash_validator.models import FileEntry, HashAlgo  # noqa: E402
+from file_hash_validator.throttle import parse_rate  # noqa: E402
+
+
+def make_tree(root: Path, files: int, size: int) -> list[FileEntry]:
+    entries = []
+    for i in range(files):
+        p = root / f"d{i % 20}" / f"f{i}.bin"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        data = os.urandom(size)
+        p.write_bytes(data)
+        entries.append(FileEntry(p, HashAlgo.SHA256, hashlib.sha256(data).hexdigest()))
+    return entries
+
+
+def report(label: str, entries: list[FileEntry], size: int, elapsed: float) -> None:
+    n = len(entries)
+    speed = n * size / elapsed / 2 ** 20
+    print(f"{label:>14}: {n / elapsed:10,.0f} файл/с {speed:8.1f} MiB/s")
+
+
+def best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000,
+                        help="Число файлов (по умолчанию 20000).")
+    parser.add_argument("--size", type=parse_rate, default=parse_rate("1K"),
+                        help="Размер файла (по умолчанию 1K).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Число потоков/процессов (по умолчанию 1 2 4 8).")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Повторов на замер, берётся лучший (по умолчанию 3).")
+    parser.add_argument("--dir", type=Path, default=None,
+                        help="Каталог для временных файлов.")
+    args = parser.parse_args()
+
+    # локальные воркеры coordinate запускаются как python -m file_hash_validator
+    os.environ["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")]))
+    size = int(args.size or 0)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        root = Path(tmp)
+        entries = make_tree(root, args.files, size)
+        check_entries(entries, progress_enabled=False)  # прогрев page cache
+
+        for n in args.workers:
+            elapsed = best_of(args.runs, lambda: check_entries(
+                entries, progress_enabled=False, workers=n))
+            report(f"потоков {n}", entries, size, elapsed)
+        for n in args.workers:
+            elapsed = best_of(args.runs, lambda: coordinate(
+                entries, workdir=root, processes=n))
+            report(f"процессов {n}", entries, size, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import tarfile
+import zipfile
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Collection, Iterator, Optional, Union
+
+from .hashing import HashingError
+
+try:
+    import lzma
+except ImportError:  # Python может быть собран без lzma
+    lzma = None
+
+# Разделитель пути к архиву и пути внутри него: bundle.tar.gz!/lib/x.so
+ARCHIVE_MARKER = "!"
+
+ARCHIVE_ERRORS: tuple[type[BaseException], ...] = (
+    tarfile.TarError,
+    zipfile.BadZipFile,
+    EOFError,
+    OSError,
+    zlib.error,
+) + ((lzma.LZMAError,) if lzma is not None else ())
+
+
+# расширения, по которым часть пути с '!' считается архивом, даже если
+# самого архива нет (чтобы сообщить «Архив не найден»)
+ARCHIVE_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz", ".tbz2",
+                    ".tar.xz", ".txz", ".zip")
+
+# ошибки zipfile при открытии отдельного члена: шифрование, неизвестный
+# метод сжатия — остальные члены архива читаются дальше
+_ZIP_MEMBER_ERRORS = (RuntimeError, NotImplementedError)
+
+
+def _is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) or path.is_file()
+
+
+def split_archive_path(path: Path) -> Optional[tuple[Path, str]]:
+    """
+    Разбирает путь вида 'dir/bundle.tar.gz!/lib/x.so' на путь к архиву
+    и имя члена архива. Часть пути с '!' считается архивом, только если
+    у неё расширение tar/zip или это существующий файл: каталог 'wow!'
+    остаётся обычным путём. Для обычных путей возвращает None.
+    """
+    parts = path.parts
+    for i, part in enumerate(parts[:-1]):
+        if len(part) > 1 and part.endswith(ARCHIVE_MARKER):
+            archive = Path(*parts[:i], part[:-len(ARCHIVE_MARKER)])
+            if _is_archive(archive):
+                return archive, "/".join(parts[i + 1:])
+    return None
+
+
+def normalize_member_name(name: str) -> str:
+    """Приводит имя члена архива к виду 'lib/x.so' (без './' и '/' в начале)."""
+    name = name.replace("\\", "/")
+    while name.startswith("./"):
+        name = name[2:]
+    return name.lstrip("/")
+
+
+def _member_path(archive: Path, name: str) -> str:
+    return f"{archive}{ARCHIVE_MARKER}/{name}"
+
+
+def iter_archive_members(
+        archive: Path,
+        names: Collection[str],
+) -> Iterator[tuple[str, Optional[int], Union[BinaryIO, HashingError]]]:
+    """
+    Перебирает запрошенные члены архива в порядке их следования в архиве.
+
+    Возвращает (имя, размер, поток). Вместо потока — HashingError, если
+    именно этот член прочитать нельзя: каталог, символьная ссылка, не
+    открылся (зашифрован, неподдерживаемый метод сжатия zip). Поток нужно
+    дочитать (или бросить) до перехода к следующему члену: tar читается
+    последовательным проходом, без распаковки на диск. Жёсткие ссылки tar
+    выдаются после остальных членов: их содержимое читается ещё одним
+    проходом по архиву (только если такие ссылки запрошены).
+
+    Ошибки открытия/чтения архива оборачиваются в HashingError.
+    """
+    wanted = {normalize_member_name(n): n for n in names}
+
+    try:
+        if zipfile.is_zipfile(archive):
+            yield from _iter_zip(archive, wanted)
+        else:
+            yield from _iter_tar(archive, wanted)
+    except FileNotFoundError as e:
+        raise HashingError("Архив не найден", archive, e) from e
+    except PermissionError as e:
+        raise HashingError("Нет прав на чтение архива", archive, e) from e
+    except ARCHIVE_ERRORS as e:
+        raise HashingError("Ошибка чтения архива", archive, e) from e
+
+
+def _iter_zip(archive: Path, wanted: dict[str, str]):
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            name = wanted.pop(normalize_member_name(info.filename), None)
+            if name is None:
+                continue
+            if info.is_dir():
+                yield name, None, HashingError("Указан каталог вместо файла",
+                                               _member_path(archive, name))
+            else:
+                try:
+                    f = zf.open(info)
+                except _ZIP_MEMBER_ERRORS as e:
+                    yield name, info.file_size, HashingError(
+                        "Не удалось открыть файл в архиве",
+                        _member_path(archive, name), e)
+                else:
+                    with f:
+                        yield name, info.file_size, f
+            if not wanted:
+                return
+
+
+def _not_a_file(archive: Path, name: str, member: tarfile.TarInfo) -> HashingError:
+    path = _member_path(archive, name)
+    if member.isdir():
+        return HashingError("Указан каталог вместо файла", path)
+    if member.issym() or member.islnk():
+        return HashingError("Ссылка в архиве не поддерживается", path)
+    return HashingError("Указан специальный файл вместо обычного", path)
+
+
+def _iter_tar(archive: Path, wanted: dict[str, str]):
+    # цель жёсткой ссылки -> запрошенные имена ссылок на неё
+    links: dict[str, list[str]] = {}
+    # "r|*" — потоковый режим: архив читается строго последовательно
+    with tarfile.open(archive, mode="r|*") as tf:
+        for member in tf:
+            name = wanted.pop(normalize_member_name(member.name), None)
+            if name is None:
+                continue
+            if member.islnk():
+                # содержимое у более раннего члена, который уже пройден
+                links.setdefault(normalize_member_name(member.linkname),
+                                 []).append(name)
+            elif member.isfile():
+                yield name, member.size, tf.extractfile(member)
+            else:
+                yield name, None, _not_a_file(archive, name, member)
+            if not wanted:
+                break
+
+    while links:
+        yield from _iter_tar_links(archive, links)
+
+
+def _iter_tar_links(archive: Path, links: dict[str, list[str]]):
+    """
+    Ещё один проход по tar: содержимое целей жёстких ссылок. Поток читается
+    один раз, поэтому за проход выдаётся одно имя на цель; выданные имена
+    удаляются из links.
+    """
+    found: set[str] = set()
+    with tarfile.open(archive, mode="r|*") as tf:
+        for member in tf:
+            target = normalize_member_name(member.name)
+            names = links.get(target)
+            if not names or target in found:
+                continue
+            found.add(target)
+            name = names.pop()
+            if not names:
+                del links[target]
+            if member.isfile():
+                yield name, member.size, tf.extractfile(member)
+            else:
+                # ссылка на ссылку или на каталог
+                yield name, None, HashingError("Ссылка в архиве не поддерживается",
+                                               _member_path(archive, name))
+            if not links:
+                return
+
+    # целей нет в архиве
+    for target in set(links) - found:
+        for name in links.pop(target):
+            yield name, None, HashingError("Файл не найден в архиве",
+                                           _member_path(archive, name))
@@ -1,12 +1,30 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Union
 
-from .hashing import HashingError, calculate
+from .archives import ARCHIVE_ERRORS, iter_archive_members, split_archive_path
+from .dirfd import DEFAULT_MAX_OPEN_DIRS, DirFdCache, open_dir
+from .hashing import HashingError, calculate, hash_fileobj
+from .http_source import ConnectionPool, calculate_url
 from .models import FileEntry
 from .progress import Progress
+from .sampling import calculate_sample, parse_sample
+from .throttle import Throttle
+
+Outcome = Union[str, HashingError]
+
+# вид задания: каталог с локальными файлами, архив или HTTP(S)-ресурс
+_PLAIN, _ARCHIVE, _URL = "plain", "archive", "url"
+_KIND_ORDER = {_PLAIN: 0, _ARCHIVE: 1, _URL: 2}
+
+DEFAULT_BATCH_SIZE = 256
 
 
 @dataclass(frozen=True, slots=True)
@@ -15,47 +33,393 @@ class CheckResult:
     ok: int
     mismatched: list[tuple[FileEntry, str]]
     read_errors: list[tuple[FileEntry, HashingError]]
+    sampled: int = 0  # из ok: подтверждено только выборочной проверкой
 
 
-def _safe_size(path: Path) -> int | None:
-    try:
-        return path.stat().st_size
-    except OSError:
-        return None
+@dataclass(slots=True)
+class _Tally:
+    """Накопитель результатов проверки."""
+    ok: int = 0
+    mismatched: list[tuple[FileEntry, str]] = field(default_factory=list)
+    read_errors: list[tuple[FileEntry, HashingError]] = field(default_factory=list)
+    sampled: int = 0
+    checked: int = 0
+    # вызывается для каждой записи: (запись, совпала ли контрольная сумма)
+    on_result: Optional[Callable[[FileEntry, bool], None]] = None
 
+    def add(self, entry: FileEntry, outcome: Outcome, sampled: bool = False) -> None:
+        self.checked += 1
+        ok = False
+        if sampled:
+            self.ok += 1
+            self.sampled += 1
+            ok = True
+        elif isinstance(outcome, HashingError):
+            self.read_errors.append((entry, outcome))
+        elif outcome.lower() == entry.expected.lower():
+            self.ok += 1
+            ok = True
+        else:
+            self.mismatched.append((entry, outcome))
+        if self.on_result is not None:
+            self.on_result(entry, ok)
 
-def check_entries(entries: Iterable[FileEntry], *, progress_enabled: bool = True) \
-        -> CheckResult:
-    entries_list = list(entries)
-    prog = Progress.from_entries(len(entries_list), enabled=progress_enabled)
-    prog.start()
+    def result(self, order: Sequence[FileEntry] = ()) -> CheckResult:
+        """Итог; mismatched и read_errors — в порядке записей order."""
+        if order:
+            # по id(): равные записи в манифесте могут повторяться
+            pos = {id(e): i for i, e in enumerate(order)}
+            self.mismatched.sort(key=lambda item: pos[id(item[0])])
+            self.read_errors.sort(key=lambda item: pos[id(item[0])])
+        return CheckResult(
+            total=self.checked,
+            ok=self.ok,
+            mismatched=self.mismatched,
+            read_errors=self.read_errors,
+            sampled=self.sampled,
+        )
+
+
+def _sample_matches(entry: FileEntry, on_read: Callable[[int], None],
+                    dir_fd: int | None) -> bool:
+    """Быстрая проверка: совпадает ли выборочная сумма (голова, хвост, блоки)."""
+    spec = parse_sample(entry.sample)
+    actual = calculate_sample(entry.path, entry.algo, blocks=spec.blocks,
+                              block_size=spec.block_size, on_read=on_read,
+                              dir_fd=dir_fd)
+    return actual.digest == spec.digest
 
-    ok = 0
+
+def merge_results(results: Iterable[CheckResult]) -> CheckResult:
+    """Объединяет результаты нескольких проверок (частей манифеста) в один."""
+    total = ok = sampled = 0
     mismatched: list[tuple[FileEntry, str]] = []
     read_errors: list[tuple[FileEntry, HashingError]] = []
+    for r in results:
+        total += r.total
+        ok += r.ok
+        sampled += r.sampled
+        mismatched.extend(r.mismatched)
+        read_errors.extend(r.read_errors)
+    return CheckResult(total=total, ok=ok, mismatched=mismatched,
+                       read_errors=read_errors, sampled=sampled)
+
+
+def _check_file(entry: FileEntry, dir_fd: int | None, *,
+                on_read: Callable[[int], None] | None,
+                on_open: Callable[[os.stat_result], None] | None = None,
+                quick: bool = False,
+                throttle: Optional[Throttle] = None,
+                no_cache: bool = False) -> tuple[Outcome, bool]:
+    """
+    Проверяет один локальный файл. Возвращает (результат, подтверждён ли
+    только выборкой).
+    """
+    if throttle is not None:
+        throttle.file_opened()
+    try:
+        if quick and entry.sample is not None and not entry.deep \
+                and _sample_matches(entry, on_read, dir_fd):
+            return entry.expected, True
+        return calculate(entry.path, entry.algo, on_read=on_read,
+                         on_open=on_open, dir_fd=dir_fd, no_cache=no_cache), False
+    except HashingError as e:
+        return e, False
+
+
+@dataclass(slots=True)
+class _Job:
+    """Записи, которые проверяются вместе: один каталог, архив или URL."""
+    kind: str
+    key: Union[Path, str]
+    entries: list[FileEntry]
+    # для архива: записи по именам членов
+    members: dict[str, list[FileEntry]] = field(default_factory=dict)
+
+
+def _job_key(entry: FileEntry) -> tuple[str, Union[Path, str], str]:
+    """(вид задания, каталог/архив/URL, имя члена архива)."""
+    if entry.url is not None:
+        return _URL, entry.url, ""
+    split = split_archive_path(entry.path)
+    if split is None:
+        return _PLAIN, entry.path.parent, ""
+    return _ARCHIVE, split[0], split[1]
+
+
+def _plan_jobs(entries: list[FileEntry], preserve_order: bool) -> list[_Job]:
+    """
+    Разбивает записи на задания.
+
+    По умолчанию записи группируются по каталогу, архиву и URL целиком,
+    чтобы каждый каталог открывался и каждый архив читался один раз:
+    сначала локальные файлы, затем архивы, затем URL (внутри вида — в
+    порядке первого упоминания). С preserve_order объединяются только
+    соседние записи, и задания идут в порядке записей.
+    """
+    jobs: list[_Job] = []
+    by_key: dict[tuple[str, Union[Path, str]], _Job] = {}
+    for entry in entries:
+        kind, key, member = _job_key(entry)
+        if preserve_order:
+            if not jobs or jobs[-1].kind != kind or jobs[-1].key != key:
+                jobs.append(_Job(kind, key, []))
+            job = jobs[-1]
+        else:
+            job = by_key.get((kind, key))
+            if job is None:
+                job = by_key[(kind, key)] = _Job(kind, key, [])
+                jobs.append(job)
+        job.entries.append(entry)
+        if kind == _ARCHIVE:
+            job.members.setdefault(member, []).append(entry)
+    if not preserve_order:
+        jobs.sort(key=lambda j: _KIND_ORDER[j.kind])
+    return jobs
+
+
+def _iter_batches(groups: Iterable[_Job], batch_size: int) \
+        -> Iterator[tuple[Path, list[FileEntry]]]:
+    """Пачки записей из одного каталога, не больше batch_size в пачке."""
+    for job in groups:
+        directory, group = Path(job.key), job.entries
+        for i in range(0, len(group), batch_size):
+            yield directory, group[i:i + batch_size]
+
+
+def _check_batch(directory: Path, batch: list[FileEntry], *,
+                 quick: bool, throttle: Optional[Throttle], no_cache: bool,
+                 stop: Optional[Callable[[], bool]] = None) \
+        -> list[tuple[Outcome, bool]]:
+    """
+    Задача воркера: пачка файлов одного каталога. Каталог открывается
+    один раз на пачку, прогресс по байтам не ведётся. После stop()
+    оставшиеся файлы пачки не проверяются (результатов для них нет).
+    """
+    on_read = throttle.bytes_read_chunk if throttle is not None else None
+    dir_fd = open_dir(directory)
+    try:
+        results = []
+        for entry in batch:
+            if stop is not None and stop():
+                break
+            results.append(_check_file(entry, dir_fd, on_read=on_read, quick=quick,
+                                       throttle=throttle, no_cache=no_cache))
+        return results
+    finally:
+        if dir_fd is not None:
+            os.close(dir_fd)
+
+
+def _check_plain_batched(ex: ThreadPoolExecutor, groups: Iterable[_Job],
+                         prog: Progress, tally: _Tally, *, workers: int,
+                         batch_size: int, quick: bool,
+                         throttle: Optional[Throttle], no_cache: bool,
+                         stop: Optional[Callable[[], bool]] = None) -> None:
+    """
+    Параллельная проверка: одна задача на пачку файлов, а не на файл.
+    В полёте не больше 2 * workers пачек; результаты учитываются в порядке
+    отправки, чтобы отчёт не зависел от планирования потоков.
+    """
+    batches = _iter_batches(groups, batch_size)
+
+    def submit(directory: Path, batch: list[FileEntry]):
+        return batch, ex.submit(_check_batch, directory, batch, quick=quick,
+                                throttle=throttle, no_cache=no_cache, stop=stop)
+
+    window = deque(submit(*b) for b in islice(batches, 2 * workers))
+    while window:
+        batch, future = window.popleft()
+        nxt = next(batches, None)
+        if nxt is not None and not (stop is not None and stop()):
+            window.append(submit(*nxt))
+        results = future.result()
+        for entry, (outcome, sampled) in zip(batch, results):
+            tally.add(entry, outcome, sampled)
+        prog.files_finished(len(results))
+
 
-    for entry in entries_list:
-        size = _safe_size(entry.path)
-        prog.file_started(entry.path, size)
+def _check_url(url: str, group: list[FileEntry], prog: Progress,
+               pool: ConnectionPool, throttle: Optional[Throttle] = None) \
+        -> Iterator[tuple[FileEntry, Outcome]]:
+    """
+    Проверяет HTTP(S)-ресурс через общий пул keep-alive соединений.
+    URL скачивается один раз для всех его записей.
+    """
+    on_read = _read_callback(prog, throttle)
+    if throttle is not None:
+        throttle.file_opened()
+    prog.file_started(group[0].path, None)
 
-        try:
-            actual = calculate(entry.path, entry.algo, on_read=prog.bytes_advanced)
+    try:
+        digests: list[Outcome] = list(calculate_url(
+            url, [e.algo for e in group], pool=pool, on_read=on_read,
+            on_size=prog.size_known))
+    except HashingError as e:
+        digests = [e] * len(group)
+
+    for entry, outcome in zip(group, digests):
+        yield entry, outcome
+        prog.file_finished()
+
+
+def _read_callback(prog: Progress, throttle: Optional[Throttle]) \
+        -> Callable[[int], None]:
+    if throttle is None:
+        return prog.bytes_advanced
 
-            if actual.lower() == entry.expected.lower():
-                ok += 1
+    def on_read(n: int) -> None:
+        throttle.bytes_read_chunk(n)
+        prog.bytes_advanced(n)
+
+    return on_read
+
+
+def _check_archive(archive: Path, members: dict[str, list[FileEntry]],
+                   prog: Progress, throttle: Optional[Throttle] = None) \
+        -> Iterator[tuple[FileEntry, Outcome]]:
+    """
+    Проверяет все записи, указывающие внутрь одного архива, за один
+    проход по архиву. Каждый член читается один раз, даже если на него
+    ссылаются несколько записей с разными алгоритмами.
+    """
+    pending = dict(members)
+    on_read = _read_callback(prog, throttle)
+    failure: Optional[HashingError] = None
+    try:
+        for name, size, f in iter_archive_members(archive, list(pending)):
+            group = pending.pop(name)
+            if throttle is not None:
+                throttle.file_opened()
+            prog.file_started(group[0].path, size)
+
+            outcomes: list[Outcome]
+            if isinstance(f, HashingError):
+                outcomes = [f] * len(group)
             else:
-                mismatched.append((entry, actual))
+                try:
+                    outcomes = list(hash_fileobj(f, [e.algo for e in group],
+                                                 on_read=on_read))
+                except ARCHIVE_ERRORS as e:
+                    failure = HashingError("Ошибка чтения архива", archive, e)
+                    outcomes = [failure] * len(group)
+
+            for entry, outcome in zip(group, outcomes):
+                yield entry, outcome
+                prog.file_finished()
 
-        except HashingError as e:
-            read_errors.append((entry, e))
+            # после ошибки посреди потока дальше архив читать нельзя
+            if failure is not None:
+                break
 
-        finally:
+    except HashingError as e:
+        failure = e
+
+    for group in pending.values():
+        for entry in group:
+            prog.file_started(entry.path, None)
+            if failure is not None:
+                yield entry, HashingError(failure.message, entry.path, failure.cause)
+            else:
+                yield entry, HashingError("Файл не найден в архиве", entry.path)
             prog.file_finished()
 
+
+def check_entries(entries: Iterable[FileEntry], *, progress_enabled: bool = True,
+                  max_open_dirs: int = DEFAULT_MAX_OPEN_DIRS,
+                  throttle: Optional[Throttle] = None,
+                  quick: bool = False,
+                  workers: int = 1,
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  no_cache: bool = False,
+                  stop: Optional[Callable[[], bool]] = None,
+                  on_result: Optional[Callable[[FileEntry, bool], None]] = None,
+                  preserve_order: bool = False,
+                  ) -> CheckResult:
+    """
+    Проверяет записи манифеста.
+
+    workers > 1 — локальные файлы проверяются пачками по batch_size
+    (из одного каталога) в пуле потоков; прогресс — только по числу файлов.
+
+    quick — быстрый режим: файлы с выборочной суммой (sample) проверяются
+    только по выборке; полный расчёт выполняется, если выборка не совпала,
+    если выборочной суммы нет или запись помечена deep.
+
+    no_cache — локальные файлы читаются через posix_fadvise
+    (SEQUENTIAL/WILLNEED/DONTNEED), не вытесняя page cache других сервисов.
+
+    stop — проверяется перед каждой записью: когда возвращает True, новые
+    записи не начинаются, а total в результате — число проверенных.
+    on_result(запись, совпала ли сумма) вызывается для каждой проверенной записи.
+
+    preserve_order — записи проверяются в переданном порядке: в задания
+    объединяются только соседние записи из одного каталога, архива или URL
+    (по умолчанию записи группируются по всему списку). mismatched и
+    read_errors в результате в любом случае идут в порядке записей.
+    """
+    entries_list = list(entries)
+    status = throttle.describe if throttle is not None else None
+    prog = Progress.from_entries(len(entries_list), enabled=progress_enabled,
+                                 status=status)
+    prog.start()
+    on_read = _read_callback(prog, throttle)
+
+    def on_open(st: os.stat_result) -> None:
+        prog.size_known(st.st_size)
+
+    def stopped() -> bool:
+        return stop is not None and stop()
+
+    tally = _Tally(on_result=on_result)
+    jobs = _plan_jobs(entries_list, preserve_order)
+
+    with ExitStack() as stack:
+        dirs = stack.enter_context(DirFdCache(max_open_dirs))
+        pool = stack.enter_context(ConnectionPool())
+        ex = stack.enter_context(ThreadPoolExecutor(max_workers=workers)) \
+            if workers > 1 else None
+
+        i = 0
+        while i < len(jobs) and not stopped():
+            job = jobs[i]
+            if job.kind == _PLAIN and ex is not None:
+                # подряд идущие каталоги — одним потоком пачек
+                end = i
+                while end < len(jobs) and jobs[end].kind == _PLAIN:
+                    end += 1
+                _check_plain_batched(ex, jobs[i:end], prog, tally, workers=workers,
+                                     batch_size=batch_size, quick=quick,
+                                     throttle=throttle, no_cache=no_cache,
+                                     stop=stop)
+                i = end
+                continue
+            i += 1
+
+            if job.kind == _PLAIN:
+                for entry in job.entries:
+                    if stopped():
+                        break
+                    dir_fd = dirs.get(Path(job.key))
+                    # размер станет известен из fstat уже открытого файла
+                    prog.file_started(entry.path, None)
+                    outcome, sampled = _check_file(
+                        entry, dir_fd, on_read=on_read, on_open=on_open,
+                        quick=quick, throttle=throttle, no_cache=no_cache)
+                    tally.add(entry, outcome, sampled)
+                    prog.file_finished()
+                continue
+
+            if job.kind == _ARCHIVE:
+                outcomes = _check_archive(Path(job.key), job.members, prog, throttle)
+            else:
+                outcomes = _check_url(str(job.key), job.entries, prog, pool,
+                                      throttle)
+            for entry, outcome in outcomes:
+                tally.add(entry, outcome)
+                if stopped():
+                    break
+
     prog.finish()
-    return CheckResult(
-        total=len(entries_list),
-        ok=ok,
-        mismatched=mismatched,
-        read_errors=read_errors,
-    )
+    # задания сгруппированы по каталогам и типам, отчёт — в порядке манифеста
+    return tally.result(entries_list)
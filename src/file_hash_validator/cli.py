@@ -1,13 +1,76 @@
 from __future__ import annotations
 
 import argparse
+import json
+import os
+import signal
 import sys
 from pathlib import Path
+from typing import Optional
 
-from .checker import check_entries
-from .parsers.common import ManifestError, ManifestValidationError
+from .checker import CheckResult, check_entries
+from .distributed import (
+    DEFAULT_SHARDS_PER_PROCESS,
+    TOKEN_ENV,
+    coordinate,
+    parse_address,
+    parse_shard,
+    run_worker,
+    select_shard,
+)
+from .hashing import HashingError, calculate
+from .index import DigestIndex, records_from_entries, records_from_tree, write_index
+from .models import FileEntry, HashAlgo
+from .parsers.common import (
+    ManifestError,
+    ManifestValidationError,
+    manifest_format,
+    parse_algo,
+)
 from .parsers.json_parser import load_json_manifest
 from .parsers.xml_parser import load_xml_manifest
+from .sampling import (
+    DEFAULT_SAMPLE_BLOCK_SIZE,
+    DEFAULT_SAMPLE_BLOCKS,
+    calculate_with_sample,
+)
+from .scrub import ScrubStateError, parse_duration, scrub
+from .throttle import Throttle, parse_rate, parse_size
+
+
+def _rate_arg(value: str) -> Optional[float]:
+    try:
+        return parse_rate(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _size_arg(value: str) -> int:
+    try:
+        return parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _algo_arg(value: str) -> HashAlgo:
+    try:
+        return parse_algo(value)
+    except ManifestValidationError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _shard_arg(value: str) -> tuple[int, int]:
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _address_arg(value: str) -> tuple[str, int]:
+    try:
+        return parse_address(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
 
 
 def build_parser() -> argparse.ArgumentParser:
@@ -20,6 +83,27 @@ def build_parser() -> argparse.ArgumentParser:
                     "XML файла-списка."
     )
 
+    _add_check_arguments(parser)
+
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Не показывать прогресс выполнения.",
+    )
+
+    parser.add_argument(
+        "--index",
+        type=Path,
+        default=None,
+        help="Индекс контрольных сумм (см. подкоманду index): для ненайденных "
+             "файлов показать, где лежит файл с тем же содержимым.",
+    )
+
+    return parser
+
+
+def _add_check_arguments(parser: argparse.ArgumentParser) -> None:
+    """Аргументы, общие для проверки и подкоманд scrub и coordinate."""
     # Обязательный аргумент - путь к файлу списку
     parser.add_argument(
         "manifest",
@@ -36,12 +120,113 @@ def build_parser() -> argparse.ArgumentParser:
     )
 
     parser.add_argument(
-        "--no-progress",
+        "--quick",
         action="store_true",
-        help="Не показывать прогресс выполнения.",
+        help="Быстрая проверка: файлы с полем 'sample' проверяются по выборке "
+             "(голова, хвост, случайные блоки), полный расчёт — только если "
+             "выборка не совпала или запись помечена 'deep'.",
     )
 
-    return parser
+    parser.add_argument(
+        "--shard",
+        type=_shard_arg,
+        default=None,
+        metavar="I/N",
+        help="Проверить только шард I из N (1 <= I <= N): записи делятся по "
+             "crc32 пути относительно --workdir, одинаково на всех узлах.",
+    )
+
+    _add_node_arguments(parser)
+
+
+def _add_node_arguments(parser: argparse.ArgumentParser) -> None:
+    """Аргументы чтения на узле: лимиты скорости, потоки, page cache."""
+    parser.add_argument(
+        "--max-bandwidth",
+        type=_rate_arg,
+        default=None,
+        help="Ограничение скорости чтения, байт/с (суффиксы K, M, G: '50M').",
+    )
+
+    parser.add_argument(
+        "--max-files-per-sec",
+        type=_rate_arg,
+        default=None,
+        help="Ограничение числа открываемых файлов в секунду.",
+    )
+
+    parser.add_argument(
+        "--throttle-control",
+        type=Path,
+        default=None,
+        help="Файл управления лимитами (max_bandwidth=..., max_files_per_sec=...),"
+             " перечитывается на лету и по сигналу SIGHUP.",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Число потоков проверки локальных файлов; при > 1 файлы "
+             "отправляются воркерам пачками, прогресс — только по числу "
+             "файлов. На мелких файлах ускорение ограничено GIL "
+             "(по умолчанию: 1).",
+    )
+
+    parser.add_argument(
+        "--no-cache-pollution",
+        action="store_true",
+        help="Читать файлы через posix_fadvise (SEQUENTIAL, WILLNEED, DONTNEED), "
+             "не вытесняя из page cache данные других сервисов.",
+    )
+
+
+def _build_throttle(args: argparse.Namespace, share: int = 1) -> Optional[Throttle]:
+    throttle = Throttle(args.max_bandwidth, args.max_files_per_sec,
+                        control_file=args.throttle_control, share=share)
+    if not throttle.enabled:
+        return None
+
+    if args.throttle_control is not None and hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, lambda *_: throttle.request_reload())
+    return throttle
+
+
+def _load_entries(manifest_path: Path, workdir: Path) -> list[FileEntry] | None:
+    """
+    Загружает манифест, определяя формат по расширению (в т.ч. сжатого
+    файла: .json.gz, .xml.xz) или по содержимому.
+    При ошибке печатает сообщение и возвращает None.
+    """
+    try:
+        fmt = manifest_format(manifest_path)
+        if fmt == "json":
+            return load_json_manifest(manifest_path, workdir=workdir)
+        if fmt == "xml":
+            return load_xml_manifest(manifest_path, workdir=workdir)
+        print("Неизвестный формат файла. Используйте .json или .xml "
+              "(можно сжатые: .json.gz, .xml.bz2, .json.xz)")
+    except (ManifestError, ManifestValidationError) as e:
+        print(f"Ошибка манифеста: {e}")
+    except OSError as e:
+        print(f"Ошибка чтения файла: {e}")
+    return None
+
+
+def _apply_shard(entries: list[FileEntry], args: argparse.Namespace) -> list[FileEntry]:
+    """Оставляет записи шарда --shard (если он задан)."""
+    if args.shard is None:
+        return entries
+    index, count = args.shard
+    entries = select_shard(entries, index, count, args.workdir)
+    print(f"Шард {index}/{count}: записей {len(entries)}")
+    return entries
+
+
+def _relocated(index: DigestIndex, entry: FileEntry) -> list[str]:
+    """Пути из индекса с тем же содержимым, что ожидалось у записи."""
+    return [p for p in index.lookup(entry.algo, entry.expected)
+            if p != entry.source]
 
 
 def main(argv: list[str] | None = None) -> int:
@@ -49,54 +234,551 @@ def main(argv: list[str] | None = None) -> int:
     Основная функция запуска программы.
     Возращает код завершения.
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     parser = build_parser()
     args = parser.parse_args(argv)
 
     manifest_path: Path = args.manifest
     workdir: Path = args.workdir
 
-    # Определяем формат по расширению файла
-    fmt = manifest_path.suffix.lower().lstrip(".")
-
-    try:
-        if fmt == "json":
-            entries = load_json_manifest(manifest_path, workdir=workdir)
-        elif fmt == "xml":
-            entries = load_xml_manifest(manifest_path, workdir=workdir)
-        else:
-            print("Неизвестный формат файла. Используйте .json или .xml")
-            return 2
-    except (ManifestError, ManifestValidationError) as e:
-        print(f"Ошибка манифеста: {e}")
-        return 2
-    except OSError as e:
-        print(f"Ошибка чтения файла: {e}")
+    entries = _load_entries(manifest_path, workdir)
+    if entries is None:
         return 2
 
     print(f"Успешно загружено записей: {len(entries)}")
+    entries = _apply_shard(entries, args)
 
     if not entries:
         return 0
 
+    index: DigestIndex | None = None
+    if args.index is not None:
+        try:
+            index = DigestIndex(args.index)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения индекса: {e}")
+            return 2
+
     # прогресс по умолчанию включаем только если stderr — терминал
     progress_enabled = (not args.no_progress) and sys.stderr.isatty()
 
-    result = check_entries(entries, progress_enabled=progress_enabled)
+    kwargs = _check_kwargs(args)
+    throttle = kwargs["throttle"]
+
+    result = check_entries(entries, progress_enabled=progress_enabled, **kwargs)
 
     print(f"Готово. Успешно: {result.ok}/{result.total}")
+    if args.quick:
+        print(f"Из них подтверждено по выборке: {result.sampled}")
+    if throttle is not None:
+        print(f"Скорость: {throttle.describe()}")
+
+    try:
+        return _report(result, index)
+    finally:
+        if index is not None:
+            index.close()
 
+
+def _check_kwargs(args: argparse.Namespace) -> dict[str, object]:
+    """Параметры check_entries из общих аргументов проверки."""
+    return {
+        "throttle": _build_throttle(args),
+        "quick": args.quick,
+        "workers": max(1, args.workers),
+        "no_cache": args.no_cache_pollution,
+    }
+
+
+def _report(result: CheckResult, index: DigestIndex | None = None) -> int:
+    """Печатает ошибки и несовпадения, возвращает код завершения."""
     if result.read_errors:
         print("\nОшибки чтения файлов:")
         for entry, err in result.read_errors:
-            print(f"- {entry.path} [{entry.algo.value}]: {err}")
+            print(f"- {entry.source} [{entry.algo.value}]: {err}")
+            if index is not None and err.is_not_found:
+                for found in _relocated(index, entry):
+                    print(f"    найден по пути: {found}")
 
     if result.mismatched:
         print("\nНесовпадения контрольных сумм:")
         for entry, actual in result.mismatched:
-            print(f"- {entry.path} [{entry.algo.value}]: "
+            print(f"- {entry.source} [{entry.algo.value}]: "
                   f"ожидается {entry.expected}, получено {actual}")
 
         # коды завершения:
         # 0 — всё ок
         # 1 — есть несовпадения/ошибки чтения
-    return 0 if (not result.mismatched and not result.read_errors) else 1
\ No newline at end of file
+    return 0 if (not result.mismatched and not result.read_errors) else 1
+
+
+def build_index_parser() -> argparse.ArgumentParser:
+    """
+        Парсер аргументов подкоманды index
+    """
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator index",
+        description="Построение обратного индекса (алгоритм, контрольная сумма)"
+                    " -> пути по манифесту или по обходу каталога."
+    )
+
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="Путь к создаваемому файлу индекса.",
+    )
+
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "--manifest",
+        type=Path,
+        help="Построить индекс по файлу-списку (JSON или XML).",
+    )
+    source.add_argument(
+        "--scan",
+        type=Path,
+        help="Построить индекс по обходу каталога (с расчётом сумм).",
+    )
+
+    parser.add_argument(
+        "--algo",
+        type=_algo_arg,
+        action="append",
+        help="Алгоритм для --scan (можно повторять, по умолчанию: sha256).",
+    )
+
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path.cwd(),
+        help="Рабочая директория для относительных путей манифеста "
+             "(по умолчанию: текущая директория).",
+    )
+
+    return parser
+
+
+def index_main(argv: list[str]) -> int:
+    args = build_index_parser().parse_args(argv)
+
+    if args.manifest is not None:
+        entries = _load_entries(args.manifest, args.workdir)
+        if entries is None:
+            return 2
+        records = records_from_entries(entries)
+    else:
+        if not args.scan.is_dir():
+            print(f"Каталог не найден: {args.scan}")
+            return 2
+        errors: list[HashingError] = []
+        records = records_from_tree(args.scan, args.algo or [HashAlgo.SHA256],
+                                    on_error=errors.append)
+
+    try:
+        count = write_index(records, args.output)
+    except OSError as e:
+        print(f"Ошибка записи индекса: {e}")
+        return 2
+
+    print(f"Записей в индексе: {count}")
+
+    if args.scan is not None and errors:
+        print("\nОшибки чтения файлов:")
+        for err in errors:
+            print(f"- {err}")
+        return 1
+    return 0
+
+
+def dups_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator dups",
+        description="Список файлов с одинаковым содержимым по индексу."
+    )
+    parser.add_argument("index", type=Path, help="Путь к файлу индекса.")
+    args = parser.parse_args(argv)
+
+    try:
+        index = DigestIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка чтения индекса: {e}")
+        return 2
+
+    groups = 0
+    with index:
+        for algo, digest, paths in index.duplicates():
+            groups += 1
+            print(f"{algo.value} {digest}:")
+            for path in paths:
+                print(f"  {path}")
+
+    print(f"Групп дубликатов: {groups}")
+    return 0
+
+
+def build_generate_parser() -> argparse.ArgumentParser:
+    """
+        Парсер аргументов подкоманды generate
+    """
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator generate",
+        description="Создание JSON файла-списка по обходу каталога "
+                    "(пути относительно каталога)."
+    )
+
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="Путь к создаваемому JSON файлу-списку.",
+    )
+
+    parser.add_argument(
+        "--scan",
+        type=Path,
+        required=True,
+        help="Каталог, по которому строится файл-список.",
+    )
+
+    parser.add_argument(
+        "--algo",
+        type=_algo_arg,
+        default=HashAlgo.SHA256,
+        help="Алгоритм контрольной суммы (по умолчанию: sha256).",
+    )
+
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Добавить выборочные суммы (поле 'sample') для режима --quick.",
+    )
+
+    parser.add_argument(
+        "--sample-blocks",
+        type=int,
+        default=DEFAULT_SAMPLE_BLOCKS,
+        help="Число случайных блоков в выборке, кроме головы и хвоста "
+             f"(по умолчанию: {DEFAULT_SAMPLE_BLOCKS}).",
+    )
+
+    parser.add_argument(
+        "--sample-block-size",
+        type=_size_arg,
+        default=DEFAULT_SAMPLE_BLOCK_SIZE,
+        help="Размер блока выборки (по умолчанию: 64K).",
+    )
+
+    return parser
+
+
+def generate_main(argv: list[str]) -> int:
+    args = build_generate_parser().parse_args(argv)
+    root: Path = args.scan
+
+    if not root.is_dir():
+        print(f"Каталог не найден: {root}")
+        return 2
+    if args.sample and args.sample_blocks < 0:
+        print("Некорректные параметры выборки")
+        return 2
+
+    files: list[dict[str, str]] = []
+    errors: list[HashingError] = []
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath, name)
+            try:
+                if args.sample:
+                    digest, sample = calculate_with_sample(
+                        path, args.algo, blocks=args.sample_blocks,
+                        block_size=args.sample_block_size)
+                else:
+                    digest, sample = calculate(path, args.algo), None
+            except HashingError as e:
+                errors.append(e)
+                continue
+
+            item = {"path": path.relative_to(root).as_posix(),
+                    "hash_type": args.algo.value, "hash": digest}
+            if sample is not None:
+                item["sample"] = str(sample)
+            files.append(item)
+
+    try:
+        args.output.write_text(
+            json.dumps({"files": files}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8")
+    except OSError as e:
+        print(f"Ошибка записи файла-списка: {e}")
+        return 2
+
+    print(f"Записей в файле-списке: {len(files)}")
+
+    if errors:
+        print("\nОшибки чтения файлов:")
+        for err in errors:
+            print(f"- {err}")
+        return 1
+    return 0
+
+
+def _fmt_age(seconds: float | None) -> str:
+    if seconds is None:
+        return "никогда"
+    for unit, size in (("д", 86400), ("ч", 3600), ("мин", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f} {unit}"
+    return f"{seconds:.0f} с"
+
+
+def _duration_arg(value: str) -> float:
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def build_scrub_parser() -> argparse.ArgumentParser:
+    """
+        Парсер аргументов подкоманды scrub
+    """
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator scrub",
+        description="Непрерывная проверка в пределах бюджета времени: каждый "
+                    "запуск проверяет записи, которые дольше всего не проверялись."
+    )
+
+    _add_check_arguments(parser)
+
+    parser.add_argument(
+        "--state",
+        type=Path,
+        required=True,
+        help="Файл состояния со временем последней проверки каждой записи.",
+    )
+
+    parser.add_argument(
+        "--budget",
+        type=_duration_arg,
+        required=True,
+        help="Бюджет времени на запуск: '2h', '90m', '1h30m', '45s'.",
+    )
+
+    return parser
+
+
+def scrub_main(argv: list[str]) -> int:
+    args = build_scrub_parser().parse_args(argv)
+
+    entries = _load_entries(args.manifest, args.workdir)
+    if entries is None:
+        return 2
+
+    print(f"Успешно загружено записей: {len(entries)}")
+    entries = _apply_shard(entries, args)
+
+    try:
+        report = scrub(entries, args.state, args.budget, **_check_kwargs(args))
+    except ScrubStateError as e:
+        print(f"Ошибка файла состояния: {e}")
+        return 2
+    except OSError as e:
+        print(f"Ошибка записи файла состояния: {e}")
+        return 2
+
+    result = report.result
+    print(f"Проверено в этот запуск: {result.total}, успешно: {result.ok}, "
+          f"не успели: {report.remaining}")
+    print(f"Ни разу не проверены успешно: {report.never_verified}")
+    print("Давность проверки: " + ", ".join(
+        f"p{pct} {_fmt_age(age)}" for pct, age in report.ages.items()))
+
+    return _report(result)
+
+
+def build_coordinate_parser() -> argparse.ArgumentParser:
+    """
+        Парсер аргументов подкоманды coordinate
+    """
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator coordinate",
+        description="Распределённая проверка: манифест делится на шарды, "
+                    "которые раздаются воркерам по TCP."
+    )
+
+    _add_check_arguments(parser)
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Число локальных процессов-воркеров (по умолчанию: число CPU; "
+             "0 — только внешние воркеры).",
+    )
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=None,
+        help="Число шардов (по умолчанию: "
+             f"{DEFAULT_SHARDS_PER_PROCESS} на процесс).",
+    )
+
+    parser.add_argument(
+        "--token-file",
+        type=Path,
+        default=None,
+        help="Файл с секретом для внешних воркеров (worker --token-file); "
+             "по умолчанию секрет генерируется на запуск и известен только "
+             "локальным воркерам.",
+    )
+
+    parser.add_argument(
+        "--listen",
+        type=_address_arg,
+        default=("127.0.0.1", 0),
+        metavar="HOST:PORT",
+        help="Адрес для подключения воркеров (по умолчанию: 127.0.0.1, "
+             "свободный порт).",
+    )
+
+    return parser
+
+
+def _node_args(args: argparse.Namespace, processes: int) -> list[str]:
+    """
+    Аргументы узла для запуска локальных воркеров: лимиты скорости делятся
+    между processes процессами, чтобы вместе они не превышали заданных.
+    """
+    result = ["--workers", str(max(1, args.workers)),
+              "--throttle-share", str(max(1, processes))]
+    if args.max_bandwidth is not None:
+        result += ["--max-bandwidth", str(args.max_bandwidth)]
+    if args.max_files_per_sec is not None:
+        result += ["--max-files-per-sec", str(args.max_files_per_sec)]
+    if args.throttle_control is not None:
+        result += ["--throttle-control", str(args.throttle_control)]
+    if args.no_cache_pollution:
+        result.append("--no-cache-pollution")
+    return result
+
+
+def _read_token(path: Path) -> str:
+    """Секрет координатора из файла."""
+    token = path.read_text(encoding="utf-8").strip()
+    if not token:
+        raise ValueError(f"Пустой файл секрета: {path}")
+    return token
+
+
+def coordinate_main(argv: list[str]) -> int:
+    args = build_coordinate_parser().parse_args(argv)
+
+    entries = _load_entries(args.manifest, args.workdir)
+    if entries is None:
+        return 2
+
+    print(f"Успешно загружено записей: {len(entries)}")
+    entries = _apply_shard(entries, args)
+
+    processes = max(0, args.processes)
+    shards = args.shards
+    if shards is None:
+        shards = max(1, processes) * DEFAULT_SHARDS_PER_PROCESS
+    if shards < 1:
+        print("Число шардов должно быть больше нуля")
+        return 2
+
+    host, port = args.listen
+    try:
+        token = _read_token(args.token_file) if args.token_file else None
+        result = coordinate(
+            entries, workdir=args.workdir, processes=processes, shards=shards,
+            quick=args.quick, host=host, port=port,
+            worker_args=_node_args(args, processes), token=token,
+            on_listen=lambda addr: print(f"Ожидание воркеров на {addr[0]}:{addr[1]}"),
+        )
+    except (OSError, ValueError) as e:
+        print(f"Ошибка координатора: {e}")
+        return 2
+
+    print(f"Готово. Успешно: {result.ok}/{result.total}")
+    if args.quick:
+        print(f"Из них подтверждено по выборке: {result.sampled}")
+
+    return _report(result)
+
+
+def worker_main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog="file-hash-validator worker",
+        description="Воркер распределённой проверки: получает шарды "
+                    "от координатора (подкоманда coordinate)."
+    )
+    parser.add_argument(
+        "--connect",
+        type=_address_arg,
+        required=True,
+        metavar="HOST:PORT",
+        help="Адрес координатора.",
+    )
+    parser.add_argument(
+        "--token-file",
+        type=Path,
+        default=None,
+        help=f"Файл с секретом координатора (по умолчанию: переменная "
+             f"окружения {TOKEN_ENV}).",
+    )
+    parser.add_argument(
+        "--workdir",
+        type=Path,
+        default=Path.cwd(),
+        help="Каталог, относительно которого резолвятся пути из заданий "
+             "координатора (как --workdir координатора на этом узле; "
+             "по умолчанию: текущая директория).",
+    )
+    parser.add_argument(
+        "--throttle-share",
+        type=int,
+        default=1,
+        help="Лимиты скорости делятся на это число (для нескольких воркеров "
+             "на одном узле; по умолчанию: 1).",
+    )
+    _add_node_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        token = _read_token(args.token_file) if args.token_file \
+            else os.environ.get(TOKEN_ENV)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка чтения секрета: {e}")
+        return 2
+    if not token:
+        print(f"Не задан секрет координатора: --token-file или {TOKEN_ENV}")
+        return 2
+
+    try:
+        run_worker(args.connect, token, workdir=args.workdir,
+                   workers=max(1, args.workers),
+                   throttle=_build_throttle(args, max(1, args.throttle_share)),
+                   no_cache=args.no_cache_pollution)
+    except OSError as e:
+        print(f"Ошибка соединения с координатором: {e}")
+        return 2
+    return 0
+
+
+# Подкоманды; без подкоманды первым аргументом идёт путь к манифесту
+COMMANDS = {
+    "index": index_main,
+    "dups": dups_main,
+    "generate": generate_main,
+    "scrub": scrub_main,
+    "coordinate": coordinate_main,
+    "worker": worker_main,
+}
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_MAX_OPEN_DIRS = 64
+
+# dir_fd поддерживается не везде (например, не на Windows)
+DIR_FD_SUPPORTED = os.open in os.supports_dir_fd
+
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) \
+    | getattr(os, "O_CLOEXEC", 0)
+
+
+def open_dir(directory: Path) -> Optional[int]:
+    """
+    Открывает каталог для работы через dir_fd. Возвращает None, если dir_fd
+    не поддерживается или каталог не открылся (тогда работаем по полному пути).
+    """
+    if not DIR_FD_SUPPORTED:
+        return None
+    try:
+        return os.open(directory, _DIR_OPEN_FLAGS)
+    except OSError:
+        return None
+
+
+class DirFdCache:
+    """
+    Ограниченный LRU-кэш открытых дескрипторов каталогов.
+
+    Позволяет открывать файлы относительно уже открытого каталога
+    (os.open(name, dir_fd=...)), чтобы не резолвить полный путь
+    на каждую операцию.
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN_DIRS) -> None:
+        if max_open < 1:
+            raise ValueError("max_open должен быть >= 1")
+        self.max_open = max_open
+        self._fds: OrderedDict[Path, int] = OrderedDict()
+
+    def get(self, directory: Path) -> Optional[int]:
+        """
+        Возвращает дескриптор каталога или None, если dir_fd не поддерживается
+        или каталог не удалось открыть (тогда вызывающий работает по полному пути).
+        """
+        fd = self._fds.get(directory)
+        if fd is not None:
+            self._fds.move_to_end(directory)
+            return fd
+
+        fd = open_dir(directory)
+        if fd is None:
+            return None
+
+        self._fds[directory] = fd
+        while len(self._fds) > self.max_open:
+            _, old_fd = self._fds.popitem(last=False)
+            os.close(old_fd)
+        return fd
+
+    def close(self) -> None:
+        while self._fds:
+            _, fd = self._fds.popitem()
+            os.close(fd)
+
+    def __len__(self) -> int:
+        return len(self._fds)
+
+    def __enter__(self) -> "DirFdCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
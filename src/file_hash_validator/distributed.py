@@ -0,0 +1,467 @@
+from __future__ import annotations
+
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from .archives import split_archive_path
+from .checker import CheckResult, check_entries, merge_results
+from .hashing import HashingError
+from .models import FileEntry, HashAlgo
+from .throttle import Throttle
+
+# Распределённая проверка: манифест делится на шарды по crc32 пути,
+# координатор раздаёт шарды воркерам по TCP (JSON, по сообщению на строку)
+# и собирает результаты. Шард упавшего воркера отдаётся другому.
+# Пути в заданиях передаются относительно --workdir: каждый узел
+# резолвит их относительно своего --workdir (точки монтирования могут
+# различаться). Воркер начинает с сообщения hello с секретом запуска: без него задания
+# не выдаются и результаты не принимаются.
+DEFAULT_SHARDS_PER_PROCESS = 4
+MAX_SHARD_ATTEMPTS = 3
+CONNECT_TIMEOUT_SEC = 10.0
+HELLO_TIMEOUT_SEC = 10.0
+PROCESS_EXIT_TIMEOUT_SEC = 5.0
+
+# секрет передаётся локальным воркерам через окружение (не виден в ps)
+TOKEN_ENV = "FILE_HASH_VALIDATOR_TOKEN"
+
+_POLL_INTERVAL_SEC = 0.2
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    """Разбирает '--shard i/n' (шарды нумеруются с 1)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError as e:
+        raise ValueError(f"Ожидается шард в виде 'i/n': {value!r}") from e
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Номер шарда должен быть от 1 до n: {value!r}")
+    return index, count
+
+
+def parse_address(value: str) -> tuple[str, int]:
+    """Разбирает адрес 'host:port'."""
+    host, sep, port = value.rpartition(":")
+    if not sep or not host or not port.isdigit():
+        raise ValueError(f"Ожидается адрес в виде 'host:port': {value!r}")
+    return host.strip("[]"), int(port)
+
+
+def _relative_to(path: Path, workdir: Path) -> Path:
+    """Путь относительно workdir; путь вне workdir остаётся как есть."""
+    try:
+        return path.relative_to(workdir)
+    except ValueError:
+        return path
+
+
+def shard_key(entry: FileEntry, workdir: Path) -> str:
+    """
+    Ключ шардирования: путь относительно workdir (одинаковый на узлах с разными
+    точками монтирования) или URL. Члены архива идут по пути архива, чтобы
+    архив читался одним воркером за один проход.
+    """
+    if entry.url is not None:
+        return entry.url
+    path = entry.path
+    split = split_archive_path(path)
+    if split is not None:
+        path = split[0]
+    return _relative_to(path, workdir).as_posix()
+
+
+def shard_of(entry: FileEntry, count: int, workdir: Path) -> int:
+    """Номер шарда записи, от 0 до count - 1."""
+    return zlib.crc32(shard_key(entry, workdir).encode("utf-8")) % count
+
+
+def partition(entries: Iterable[FileEntry], count: int,
+              workdir: Path) -> list[list[FileEntry]]:
+    """Разбивает записи на count шардов (порядок внутри шарда сохраняется)."""
+    shards: list[list[FileEntry]] = [[] for _ in range(count)]
+    for entry in entries:
+        shards[shard_of(entry, count, workdir)].append(entry)
+    return shards
+
+
+def select_shard(entries: Iterable[FileEntry], index: int, count: int,
+                 workdir: Path) -> list[FileEntry]:
+    """Записи шарда index из count (index с 1, как в --shard i/n)."""
+    return [e for e in entries if shard_of(e, count, workdir) == index - 1]
+
+
+def _entry_to_wire(entry: FileEntry, workdir: Path) -> dict[str, Any]:
+    # для URL путь только для отображения; данные читаются по url
+    path = entry.path if entry.url is not None \
+        else _relative_to(entry.path, workdir)
+    return {"path": path.as_posix(), "algo": entry.algo.value,
+            "expected": entry.expected, "url": entry.url,
+            "sample": entry.sample, "deep": entry.deep}
+
+
+def _entry_from_wire(obj: dict[str, Any], workdir: Path) -> FileEntry:
+    url = obj.get("url")
+    path = Path(obj["path"])
+    if url is None and not path.is_absolute():
+        path = workdir / path
+    return FileEntry(path, HashAlgo(obj["algo"]), obj["expected"],
+                     url=url, sample=obj.get("sample"),
+                     deep=bool(obj.get("deep")))
+
+
+def _error_to_wire(err: HashingError) -> dict[str, Any]:
+    return {"message": err.message, "path": str(err.path),
+            "cause": str(err.cause) if err.cause is not None else None,
+            "not_found": err.is_not_found}
+
+
+def _error_from_wire(obj: dict[str, Any]) -> HashingError:
+    # тип исходного исключения не передаётся; FileNotFoundError сохраняет
+    # is_not_found (нужен для поиска перемещённых файлов по индексу)
+    cause: Optional[BaseException] = None
+    if obj.get("cause") is not None:
+        cause_type = FileNotFoundError if obj.get("not_found") else OSError
+        cause = cause_type(obj["cause"])
+    return HashingError(obj["message"], obj["path"], cause)
+
+
+def _result_to_wire(shard: int, entries: Sequence[FileEntry],
+                    result: CheckResult) -> dict[str, Any]:
+    # записи передаются номерами в задании шарда
+    index = {entry: i for i, entry in reversed(list(enumerate(entries)))}
+    return {
+        "type": "result", "shard": shard, "total": result.total,
+        "ok": result.ok, "sampled": result.sampled,
+        "mismatched": [[index[e], actual] for e, actual in result.mismatched],
+        "read_errors": [[index[e], _error_to_wire(err)]
+                        for e, err in result.read_errors],
+    }
+
+
+def _result_from_wire(msg: dict[str, Any], entries: Sequence[FileEntry]) -> CheckResult:
+    return CheckResult(
+        total=int(msg["total"]),
+        ok=int(msg["ok"]),
+        mismatched=[(entries[i], str(actual)) for i, actual in msg["mismatched"]],
+        read_errors=[(entries[i], _error_from_wire(err))
+                     for i, err in msg["read_errors"]],
+        sampled=int(msg["sampled"]),
+    )
+
+
+class _Channel:
+    """Сообщения JSON по одному на строку поверх TCP-соединения."""
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self._reader = sock.makefile("rb")
+
+    def send(self, msg: dict[str, Any]) -> None:
+        data = json.dumps(msg, ensure_ascii=False, separators=(",", ":"))
+        self.sock.sendall(data.encode("utf-8") + b"\n")
+
+    def recv(self) -> Optional[dict[str, Any]]:
+        """Следующее сообщение; None — соединение закрыто."""
+        line = self._reader.readline()
+        if not line:
+            return None
+        msg = json.loads(line)
+        if not isinstance(msg, dict):
+            raise ValueError("Ожидается JSON-объект")
+        return msg
+
+    def shutdown(self) -> None:
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        self._reader.close()
+        self.sock.close()
+
+
+class Coordinator:
+    """
+    Раздаёт шарды подключившимся воркерам и собирает результаты.
+    Пути записей передаются воркерам относительно workdir.
+
+    Каждому воркеру выдаётся по одному шарду; следующий — после ответа.
+    Если воркер отключился или прислал некорректный ответ, шард возвращается
+    в очередь; после max_attempts неудач записи шарда считаются ошибками чтения.
+    Соединения без верного секрета token закрываются без выдачи заданий;
+    без token секрет генерируется случайно.
+    """
+
+    def __init__(self, entries: Iterable[FileEntry], *, shards: int, workdir: Path,
+                 quick: bool = False, host: str = "127.0.0.1", port: int = 0,
+                 max_attempts: int = MAX_SHARD_ATTEMPTS,
+                 token: Optional[str] = None) -> None:
+        if shards < 1:
+            raise ValueError("Число шардов должно быть >= 1")
+        self.token = token if token is not None else secrets.token_hex(16)
+        self.workdir = workdir
+        self.quick = quick
+        self.max_attempts = max_attempts
+        # пустые шарды не раздаём
+        self._shards = {i: part for i, part in
+                        enumerate(partition(entries, shards, workdir)) if part}
+        self._queue: queue.Queue[int] = queue.Queue()
+        for i in self._shards:
+            self._queue.put(i)
+        self._attempts: Counter[int] = Counter()
+        self._results: dict[int, CheckResult] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._closed = threading.Event()
+        self._handlers: list[threading.Thread] = []
+        self._channels: set[_Channel] = set()
+        self.active = 0
+        if not self._shards:
+            self._done.set()
+
+        self._server = socket.create_server((host, port))
+        self.address: tuple[str, int] = self._server.getsockname()[:2]
+
+    @property
+    def shard_count(self) -> int:
+        """Число непустых шардов."""
+        return len(self._shards)
+
+    def serve(self, processes: Sequence[subprocess.Popen] = ()) -> CheckResult:
+        """
+        Обслуживает воркеров до обработки всех шардов.
+        processes — запущенные локальные воркеры: если все они завершились,
+        а подключённых нет, оставшиеся шарды считаются непроверенными.
+        Без processes ждёт подключения внешних воркеров.
+        """
+        acceptor = threading.Thread(target=self._accept_loop, daemon=True)
+        acceptor.start()
+        try:
+            while not self._done.wait(_POLL_INTERVAL_SEC):
+                if processes and self.active == 0 \
+                        and all(p.poll() is not None for p in processes):
+                    self._abandon("Воркеры завершились, не проверив запись")
+        finally:
+            self.close()
+            acceptor.join()
+            for t in self._handlers:
+                t.join()
+        return merge_results(self._results[i] for i in sorted(self._results))
+
+    def close(self) -> None:
+        self._closed.set()
+        self._server.close()
+        if not self._done.is_set():
+            # прерванная проверка: не ждём ответов от воркеров
+            with self._lock:
+                channels = list(self._channels)
+            for chan in channels:
+                chan.shutdown()
+
+    def __enter__(self) -> "Coordinator":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _accept_loop(self) -> None:
+        self._server.settimeout(_POLL_INTERVAL_SEC)
+        while not self._closed.is_set():
+            try:
+                sock, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            chan = _Channel(sock)
+            with self._lock:
+                self.active += 1
+                self._channels.add(chan)
+            t = threading.Thread(target=self._serve_worker, args=(chan,),
+                                 daemon=True)
+            self._handlers.append(t)
+            t.start()
+
+    def _next_shard(self) -> Optional[int]:
+        while True:
+            try:
+                return self._queue.get(timeout=_POLL_INTERVAL_SEC)
+            except queue.Empty:
+                if self._done.is_set() or self._closed.is_set():
+                    return None
+
+    def _authenticate(self, chan: _Channel) -> bool:
+        chan.sock.settimeout(HELLO_TIMEOUT_SEC)
+        try:
+            msg = chan.recv()
+        except (OSError, ValueError):
+            return False
+        chan.sock.settimeout(None)
+        token = msg.get("token") if msg is not None else None
+        return msg is not None and msg.get("type") == "hello" \
+            and isinstance(token, str) \
+            and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def _serve_worker(self, chan: _Channel) -> None:
+        try:
+            if not self._authenticate(chan):
+                return
+            while (shard := self._next_shard()) is not None:
+                entries = self._shards[shard]
+                try:
+                    chan.send({"type": "task", "shard": shard, "quick": self.quick,
+                               "entries": [_entry_to_wire(e, self.workdir)
+                                           for e in entries]})
+                    msg = chan.recv()
+                    if msg is None or msg.get("type") != "result" \
+                            or msg.get("shard") != shard:
+                        raise ValueError("Некорректный ответ воркера")
+                    result = _result_from_wire(msg, entries)
+                except (OSError, ValueError, LookupError, TypeError):
+                    self._failed(shard)
+                    return
+                self._complete(shard, result)
+            try:
+                chan.send({"type": "done"})
+            except OSError:
+                pass
+        finally:
+            chan.close()
+            with self._lock:
+                self.active -= 1
+                self._channels.discard(chan)
+
+    def _complete(self, shard: int, result: CheckResult) -> None:
+        with self._lock:
+            self._results.setdefault(shard, result)
+            if len(self._results) == len(self._shards):
+                self._done.set()
+
+    def _failed(self, shard: int) -> None:
+        with self._lock:
+            self._attempts[shard] += 1
+            retry = self._attempts[shard] < self.max_attempts
+        if retry:
+            self._queue.put(shard)
+        else:
+            self._complete(shard, self._unchecked(
+                shard, "Воркер несколько раз завершился, не проверив запись"))
+
+    def _abandon(self, message: str) -> None:
+        while True:
+            try:
+                shard = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._complete(shard, self._unchecked(shard, message))
+
+    def _unchecked(self, shard: int, message: str) -> CheckResult:
+        entries = self._shards[shard]
+        return CheckResult(total=len(entries), ok=0, mismatched=[],
+                           read_errors=[(e, HashingError(message, e.source))
+                                        for e in entries])
+
+
+def worker_command(address: tuple[str, int],
+                   extra_args: Sequence[str] = ()) -> list[str]:
+    """Команда запуска локального воркера, подключающегося к address."""
+    host, port = address
+    return [sys.executable, "-m", "file_hash_validator", "worker",
+            "--connect", f"{host}:{port}", *extra_args]
+
+
+def coordinate(entries: Iterable[FileEntry], *, workdir: Path, processes: int = 2,
+               shards: Optional[int] = None, quick: bool = False,
+               host: str = "127.0.0.1", port: int = 0,
+               worker_args: Sequence[str] = (),
+               token: Optional[str] = None,
+               on_listen: Callable[[tuple[str, int]], None] | None = None,
+               ) -> CheckResult:
+    """
+    Проверка манифеста в processes локальных процессах-воркерах
+    (и внешних воркерах с тем же секретом token, подключившихся к тому же
+    адресу). Без token секрет генерируется на запуск и передаётся локальным
+    воркерам через переменную окружения TOKEN_ENV. Локальные воркеры
+    резолвят пути относительно того же workdir.
+    По умолчанию шардов в DEFAULT_SHARDS_PER_PROCESS раз больше процессов,
+    чтобы нагрузка выравнивалась.
+    """
+    if shards is None:
+        shards = max(1, processes) * DEFAULT_SHARDS_PER_PROCESS
+    with Coordinator(entries, shards=shards, workdir=workdir, quick=quick,
+                     host=host, port=port, token=token) as coord:
+        if on_listen is not None:
+            on_listen(coord.address)
+        env = {**os.environ, TOKEN_ENV: coord.token}
+        args = ["--workdir", str(workdir), *worker_args]
+        procs = [subprocess.Popen(worker_command(coord.address, args), env=env)
+                 for _ in range(processes)]
+        try:
+            return coord.serve(procs)
+        finally:
+            # подключённые воркеры уже получили 'done'; процессы, не успевшие
+            # подключиться до конца проверки, больше не нужны
+            for p in procs:
+                if p.poll() is None:
+                    p.terminate()
+            for p in procs:
+                try:
+                    p.wait(PROCESS_EXIT_TIMEOUT_SEC)
+                except subprocess.TimeoutExpired:
+                    p.kill()
+                    p.wait()
+
+
+def _connect(address: tuple[str, int], timeout: float) -> socket.socket:
+    # координатор может ещё не слушать: повторяем до timeout
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection(address, timeout=timeout)
+        except OSError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(_POLL_INTERVAL_SEC)
+
+
+def run_worker(address: tuple[str, int], token: str, *,
+               workdir: Optional[Path] = None, workers: int = 1,
+               throttle: Optional[Throttle] = None, no_cache: bool = False,
+               connect_timeout: float = CONNECT_TIMEOUT_SEC) -> int:
+    """
+    Воркер: получает шарды от координатора и проверяет их через check_entries.
+    Относительные пути заданий резолвятся от workdir (по умолчанию — текущий
+    каталог). Возвращает число проверенных шардов. Ошибка соединения — OSError.
+    """
+    if workdir is None:
+        workdir = Path.cwd()
+    sock = _connect(address, connect_timeout)
+    sock.settimeout(None)
+    chan = _Channel(sock)
+    done = 0
+    try:
+        chan.send({"type": "hello", "token": token})
+        while (msg := chan.recv()) is not None and msg.get("type") == "task":
+            entries = [_entry_from_wire(obj, workdir) for obj in msg["entries"]]
+            result = check_entries(entries, progress_enabled=False,
+                                   quick=bool(msg.get("quick")), workers=workers,
+                                   throttle=throttle, no_cache=no_cache)
+            chan.send(_result_to_wire(msg["shard"], entries, result))
+            done += 1
+    finally:
+        chan.close()
+    return done
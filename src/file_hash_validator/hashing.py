@@ -1,27 +1,43 @@
 from __future__ import annotations
 
+import errno
 import hashlib
+import os
+import stat
 import zlib
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Optional, Union
+from typing import BinaryIO, Callable, Optional, Sequence, Union
 
 from .models import HashAlgo
 
 DEFAULT_CHUNK_SIZE = 1024 * 1024
 
+# файлы не больше этого размера читаются одним os.read
+SMALL_FILE_THRESHOLD = 64 * 1024
+
+# режим без засорения page cache (posix_fadvise есть не на всех платформах)
+FADVISE_SUPPORTED = hasattr(os, "posix_fadvise")
+FADVISE_WINDOW = 8 * 1024 * 1024  # окно readahead и шаг сброса прочитанного
+
 
 @dataclass
 class HashingError(Exception):
     """Ошибка расчёта контрольной суммы (чтение/доступ к файлу)."""
     message: str
-    path: Path
+    path: Union[Path, str]
     cause: Optional[BaseException] = None
 
     def __str__(self) -> str:
         base = f"{self.message}: {self.path}"
         return f"{base} ({self.cause})" if self.cause else base
 
+    @property
+    def is_not_found(self) -> bool:
+        """Ошибка означает, что файла (или архива с ним) нет по пути."""
+        return isinstance(self.cause, FileNotFoundError) \
+            or self.message.startswith(("Файл не найден", "Архив не найден"))
+
 
 class CRC32Wrapper:
     def __init__(self):
@@ -46,12 +62,213 @@ def _normalize_algo(algo: Union[HashAlgo, str]) -> HashAlgo:
         raise ValueError(f"Неподдерживаемый алгоритм: {algo!r}") from e
 
 
+def new_hasher(algo: HashAlgo):
+    """Создаёт объект с интерфейсом update()/hexdigest() для алгоритма."""
+    if algo is HashAlgo.CRC32:
+        return CRC32Wrapper()
+    return hashlib.new(algo.value)
+
+
+def hash_fileobj(
+        f: BinaryIO,
+        algos: Sequence[HashAlgo],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_read: Callable[[int], None] | None = None,
+) -> list[str]:
+    """
+    Потоково читает открытый бинарный поток и считает по нему сразу
+    все переданные алгоритмы (за один проход). Ошибки чтения не оборачиваются.
+    """
+    hashers = [new_hasher(a) for a in algos]
+
+    while chunk := f.read(chunk_size):
+        if on_read:
+            on_read(len(chunk))
+        for h in hashers:
+            h.update(chunk)
+
+    return [h.hexdigest() for h in hashers]
+
+
+def _io_error(p: Path, e: OSError) -> HashingError:
+    """Классифицирует ошибку чтения файла."""
+    if isinstance(e, FileNotFoundError):
+        return HashingError("Файл не найден", p, e)
+    if isinstance(e, PermissionError):
+        return HashingError("Нет прав на чтение файла", p, e)
+    if isinstance(e, IsADirectoryError):
+        return HashingError("Указан каталог вместо файла", p, e)
+    return HashingError("Ошибка ввода-вывода при чтении файла", p, e)
+
+
+def _hash_small(
+        f: BinaryIO,
+        size: int,
+        algo: HashAlgo,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_read: Callable[[int], None] | None = None,
+) -> str:
+    """
+    Быстрый путь для маленького файла известного размера: читаем size + 1
+    байт (лишний байт показывает, что файл вырос после fstat), без цикла
+    по chunk'ам. Если файл вырос, дочитываем обычным циклом.
+    """
+    h = new_hasher(algo)
+    data = f.read(size + 1)
+    # без буферизации read() — один read(2), на FUSE/сетевых ФС он может
+    # вернуть меньше запрошенного: дочитываем до size + 1 или EOF
+    while data and len(data) <= size:
+        more = f.read(size + 1 - len(data))
+        if not more:
+            break
+        data += more
+    if on_read and data:
+        on_read(len(data))
+    h.update(data)
+
+    if len(data) > size:
+        while chunk := f.read(chunk_size):
+            if on_read:
+                on_read(len(chunk))
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def _fadvise(fd: int, offset: int, length: int, advice: int) -> None:
+    try:
+        os.posix_fadvise(fd, offset, length, advice)
+    except OSError:
+        pass  # совет ядру необязателен: на ошибке просто читаем как обычно
+
+
+def _hash_no_cache(
+        f: BinaryIO,
+        algo: HashAlgo,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_read: Callable[[int], None] | None = None,
+) -> str:
+    """
+    Потоковое чтение, не вытесняющее из page cache данные других процессов:
+    - SEQUENTIAL в начале чтения (агрессивный readahead ядра)
+    - WILLNEED на окно впереди текущей позиции
+    - DONTNEED на уже прочитанные и захешированные диапазоны
+    """
+    fd = f.fileno()
+    _fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    _fadvise(fd, 0, FADVISE_WINDOW, os.POSIX_FADV_WILLNEED)
+    prefetched = FADVISE_WINDOW
+    dropped = 0
+    pos = 0
+
+    h = new_hasher(algo)
+    while chunk := f.read(chunk_size):
+        pos += len(chunk)
+        if on_read:
+            on_read(len(chunk))
+        h.update(chunk)
+
+        if pos + FADVISE_WINDOW > prefetched:
+            _fadvise(fd, prefetched, FADVISE_WINDOW, os.POSIX_FADV_WILLNEED)
+            prefetched += FADVISE_WINDOW
+        if pos - dropped >= FADVISE_WINDOW:
+            _fadvise(fd, dropped, pos - dropped, os.POSIX_FADV_DONTNEED)
+            dropped = pos
+
+    # остаток до конца файла (length=0 — до EOF)
+    _fadvise(fd, dropped, 0, os.POSIX_FADV_DONTNEED)
+    return h.hexdigest()
+
+
+# ошибки open(), при которых Path.exists() возвращал False
+_NOT_FOUND_ERRNOS = frozenset({errno.ENOENT, errno.ENOTDIR, errno.ELOOP, errno.EBADF})
+
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0) | getattr(os, "O_CLOEXEC", 0) \
+    | getattr(os, "O_NONBLOCK", 0)  # FIFO не должен блокировать open()
+
+
+def _permission_error(p: Path, dir_fd: int | None, e: PermissionError) -> HashingError:
+    """
+    EACCES от open(): нет прав на сам файл или на каталог по пути.
+    Как и раньше (exists() перед open()), недоступный путь — «Ошибка доступа
+    к пути», существующий, но нечитаемый файл — «Нет прав на чтение файла».
+    """
+    try:
+        if dir_fd is None:
+            os.stat(p)
+        else:
+            os.stat(p.name, dir_fd=dir_fd)
+    except OSError as stat_error:
+        if stat_error.errno in _NOT_FOUND_ERRNOS:
+            return HashingError("Файл не найден", p)
+        return HashingError("Ошибка доступа к пути", p, stat_error)
+    return HashingError("Нет прав на чтение файла", p, e)
+
+
+def open_for_hashing(
+        path: Union[Path, str],
+        dir_fd: int | None = None,
+) -> tuple[int, os.stat_result]:
+    """
+    Открывает файл одним os.open и делает один os.fstat по дескриптору.
+
+    Результат fstat используется и для размера (прогресс), и для проверки
+    типа файла, поэтому отдельные stat()/exists()/is_dir() по пути не нужны.
+    Если передан dir_fd, файл открывается по имени относительно каталога.
+    Возвращает (fd, stat); закрыть fd должен вызывающий.
+    Классификация ошибок та же, что была у предварительных проверок пути.
+    """
+    p = path if isinstance(path, Path) else Path(path)
+
+    try:
+        if dir_fd is None:
+            fd = os.open(p, _OPEN_FLAGS)
+        else:
+            fd = os.open(p.name, _OPEN_FLAGS, dir_fd=dir_fd)
+    except IsADirectoryError as e:
+        raise HashingError("Указан каталог вместо файла", p, e) from e
+    except PermissionError as e:
+        # Windows не открывает каталоги через os.open
+        if os.name == "nt" and os.path.isdir(p):
+            raise HashingError("Указан каталог вместо файла", p) from e
+        raise _permission_error(p, dir_fd, e) from e
+    except OSError as e:
+        if e.errno in _NOT_FOUND_ERRNOS:
+            raise HashingError("Файл не найден", p) from e
+        raise HashingError("Ошибка доступа к пути", p, e) from e
+
+    try:
+        st = os.fstat(fd)
+        if stat.S_ISDIR(st.st_mode):
+            raise HashingError("Указан каталог вместо файла", p)
+        # FIFO и сокет не хешируем (чтение зависло бы или не имеет смысла);
+        # блочные и символьные устройства читаются, как и раньше
+        if stat.S_ISFIFO(st.st_mode) or stat.S_ISSOCK(st.st_mode):
+            raise HashingError("Указан специальный файл вместо обычного", p)
+        if not stat.S_ISREG(st.st_mode):
+            os.set_blocking(fd, True)
+    except OSError as e:
+        os.close(fd)
+        raise HashingError("Ошибка доступа к пути", p, e) from e
+    except HashingError:
+        os.close(fd)
+        raise
+
+    return fd, st
+
+
 def calculate(
         path: Union[Path, str],
         algo: Union[HashAlgo, str],
         *,
         chunk_size: int = DEFAULT_CHUNK_SIZE,
         on_read: Callable[[int], None] | None = None,
+        on_open: Callable[[os.stat_result], None] | None = None,
+        dir_fd: int | None = None,
+        no_cache: bool = False,
 ) -> str:
     """
     calculate(path, algo) -> str
@@ -59,40 +276,51 @@ def calculate(
     - CRC32 инкрементально, результат hex lowercase (8 символов)
     - MD5 / SHA256 через hashlib
     - ошибки чтения файла оборачиваются в HashingError
+    - файл открывается один раз (open_for_hashing), результат fstat
+      передаётся в on_open (например, размер для прогресса)
+    - если передан dir_fd (дескриптор родительского каталога), файл
+      открывается по имени относительно него, без резолва полного пути
+    - no_cache: читать через posix_fadvise, не засоряя page cache
+      (где posix_fadvise недоступен, флаг игнорируется)
     """
     p = path if isinstance(path, Path) else Path(path)
     a = _normalize_algo(algo)
 
-    # Предварительные проверки
-    try:
-        if not p.exists():
-            raise HashingError("Файл не найден", p)
-        if p.is_dir():
-            raise HashingError("Указан каталог вместо файла", p)
-    except OSError as e:
-        raise HashingError("Ошибка доступа к пути", p, e) from e
+    fd, st = open_for_hashing(p, dir_fd)
 
     try:
-        with p.open("rb") as f:
-            if a is HashAlgo.CRC32:
-                h = CRC32Wrapper()
-            else:
-                h = hashlib.new(a.value)
+        with open(fd, "rb", buffering=0) as f:
+            if on_open:
+                on_open(st)
+            if no_cache and FADVISE_SUPPORTED:
+                return _hash_no_cache(f, a, chunk_size=chunk_size, on_read=on_read)
+            if st.st_size <= SMALL_FILE_THRESHOLD:
+                return _hash_small(f, st.st_size, a, chunk_size=chunk_size,
+                                   on_read=on_read)
+            return hash_fileobj(f, [a], chunk_size=chunk_size, on_read=on_read)[0]
 
-            while chunk := f.read(chunk_size):
-                if on_read:
-                    on_read(len(chunk))
-                h.update(chunk)
+    except OSError as e:
+        raise _io_error(p, e) from e
 
-            return h.hexdigest()
 
+def calculate_many(
+        path: Union[Path, str],
+        algos: Sequence[Union[HashAlgo, str]],
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[str]:
+    """
+    Как calculate(), но сразу для нескольких алгоритмов: файл открывается
+    и читается один раз. Результаты — в порядке algos.
+    """
+    p = path if isinstance(path, Path) else Path(path)
+    normalized = [_normalize_algo(a) for a in algos]
 
+    fd, _ = open_for_hashing(p)
+
+    try:
+        with open(fd, "rb", buffering=0) as f:
+            return hash_fileobj(f, normalized, chunk_size=chunk_size)
 
-    except FileNotFoundError as e:
-        raise HashingError("Файл не найден", p, e) from e
-    except PermissionError as e:
-        raise HashingError("Нет прав на чтение файла", p, e) from e
-    except IsADirectoryError as e:
-        raise HashingError("Указан каталог вместо файла", p, e) from e
     except OSError as e:
-        raise HashingError("Ошибка ввода-вывода при чтении файла", p, e) from e
+        raise _io_error(p, e) from e
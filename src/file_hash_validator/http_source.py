@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import http.client
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .hashing import DEFAULT_CHUNK_SIZE, HashingError, new_hasher
+from .models import HashAlgo
+
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_PARALLEL = 4
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT_SEC = 30.0
+RETRY_BACKOFF_SEC = 0.2
+
+# коды ответа, при которых запрос имеет смысл повторить
+TRANSIENT_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+_URL_RE = re.compile(r"^https?://", re.IGNORECASE)
+_CONTENT_RANGE_RE = re.compile(r"^bytes\s+(\d+)-(\d+)/(\d+|\*)$")
+
+_Key = tuple[str, str, int]
+
+
+def is_url(value: str) -> bool:
+    return bool(_URL_RE.match(value))
+
+
+class _TransientError(Exception):
+    """Временная ошибка (обрыв соединения, 5xx, 429) — запрос можно повторить."""
+
+
+class _RangeNotSatisfiable(Exception):
+    """416 на Range-запрос: ресурс пустой."""
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул keep-alive соединений http.client по (схема, хост, порт).
+
+    Соединение возвращается в пул только если ответ дочитан до конца
+    и сервер не закрывает соединение.
+    """
+
+    def __init__(self, max_idle_per_host: int = DEFAULT_PARALLEL, *,
+                 timeout: float = DEFAULT_TIMEOUT_SEC) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: dict[_Key, list[http.client.HTTPConnection]] = {}
+
+    def acquire(self, key: _Key) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" \
+            else http.client.HTTPConnection
+        return cls(host, port, timeout=self.timeout)
+
+    def release(self, key: _Key, conn: http.client.HTTPConnection,
+                reusable: bool) -> None:
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _split(url: str) -> tuple[_Key, str]:
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+    return (scheme, parts.hostname or "", port), target
+
+
+def _check_status(url: str, status: int) -> None:
+    if status in TRANSIENT_STATUSES:
+        raise _TransientError(f"HTTP {status}")
+    if status == 416:
+        raise _RangeNotSatisfiable()
+    if status == 404:
+        raise HashingError("Файл не найден", url)
+    if status in (401, 403):
+        raise HashingError("Нет прав на чтение файла", url)
+    # редирект, 204 и прочие коды — не тело ресурса: хешировать их нельзя
+    if status not in (200, 206):
+        raise HashingError(f"Ошибка HTTP {status}", url)
+
+
+class _Fetcher:
+    """Запросы к одному URL через общий пул соединений."""
+
+    def __init__(self, pool: ConnectionPool, url: str, retries: int) -> None:
+        self.pool = pool
+        self.url = url
+        self.retries = retries
+        self.key, self.target = _split(url)
+
+    def request(self, headers: dict[str, str],
+                consume: Callable[[http.client.HTTPResponse], object]) -> object:
+        """
+        Выполняет GET и передаёт ответ в consume (который дочитывает тело).
+        Временные ошибки повторяются с экспоненциальной задержкой;
+        consume при повторе вызывается заново.
+        """
+        for attempt in range(self.retries + 1):
+            conn = self.pool.acquire(self.key)
+            reusable = False
+            try:
+                conn.request("GET", self.target, headers=headers)
+                resp = conn.getresponse()
+                try:
+                    _check_status(self.url, resp.status)
+                    result = consume(resp)
+                    resp.read()  # дочитываем остаток, чтобы переиспользовать
+                    reusable = not resp.will_close
+                    return result
+                finally:
+                    if not reusable:
+                        resp.close()
+            except (_TransientError, OSError, http.client.HTTPException) as e:
+                if attempt >= self.retries:
+                    raise HashingError(
+                        "Ошибка ввода-вывода при чтении файла", self.url, e) from e
+                time.sleep(RETRY_BACKOFF_SEC * (2 ** attempt))
+            finally:
+                self.pool.release(self.key, conn, reusable)
+        raise AssertionError("unreachable")
+
+    def fetch_range(self, start: int, end: int) -> bytes:
+        def consume(resp: http.client.HTTPResponse) -> bytes:
+            if resp.status != 206:
+                raise HashingError("Сервер перестал поддерживать Range", self.url)
+            data = resp.read()
+            if len(data) != end - start + 1:
+                raise _TransientError("Неполный ответ на Range-запрос")
+            return data
+
+        return self.request({"Range": f"bytes={start}-{end}"}, consume)
+
+
+def _parse_content_range(url: str, resp: http.client.HTTPResponse) \
+        -> tuple[int, int, int]:
+    """(начало, конец, полный размер) из Content-Range ответа 206."""
+    m = _CONTENT_RANGE_RE.match(resp.getheader("Content-Range", "").strip())
+    if m is None or m.group(3) == "*":
+        raise HashingError("Некорректный Content-Range в ответе сервера", url)
+    return int(m.group(1)), int(m.group(2)), int(m.group(3))
+
+
+def calculate_url(
+        url: str,
+        algos: Sequence[HashAlgo],
+        *,
+        pool: ConnectionPool,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_read: Callable[[int], None] | None = None,
+        on_size: Callable[[int], None] | None = None,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        parallel: int = DEFAULT_PARALLEL,
+        retries: int = DEFAULT_RETRIES,
+) -> list[str]:
+    """
+    Считает контрольные суммы HTTP(S)-ресурса, не сохраняя его на диск.
+
+    - первый запрос идёт с Range на первый сегмент; если сервер ответил 206,
+      остальные сегменты большого объекта запрашиваются параллельно
+      (не более parallel одновременно) и подаются в хешеры по порядку
+    - если сервер Range не поддерживает (200), тело читается потоково
+    - временные ошибки (обрыв, 5xx, 429) повторяются до retries раз
+    - ошибки оборачиваются в HashingError
+    """
+    fetcher = _Fetcher(pool, url, retries)
+    hashers: list = []
+    total: list[Optional[int]] = [None]
+    received = [0]  # байт с начала ресурса, полученных первым запросом
+
+    def consume_first(resp: http.client.HTTPResponse) -> None:
+        # при повторе запроса начинаем считать заново
+        hashers[:] = [new_hasher(a) for a in algos]
+        expected: Optional[int] = None
+        if resp.status == 206:
+            # сервер может вернуть диапазон короче запрошенного: остальные
+            # сегменты продолжаются с его конца
+            start, end, total[0] = _parse_content_range(url, resp)
+            if start != 0:
+                raise _TransientError("Ответ на Range начинается не с начала")
+            expected = end + 1
+        else:
+            length = resp.getheader("Content-Length")
+            total[0] = int(length) if length and length.isdigit() else None
+        if on_size is not None and total[0] is not None:
+            on_size(total[0])
+        read = 0
+        while chunk := resp.read(chunk_size):
+            read += len(chunk)
+            if on_read:
+                on_read(len(chunk))
+            for h in hashers:
+                h.update(chunk)
+        if expected is not None and read != expected:
+            raise _TransientError("Неполный ответ на Range-запрос")
+        received[0] = read
+        if resp.status != 206:
+            total[0] = None  # тело получено целиком
+
+    try:
+        fetcher.request({"Range": f"bytes=0-{segment_size - 1}"}, consume_first)
+    except _RangeNotSatisfiable:
+        # пустой ресурс — запрашиваем без Range
+        fetcher.request({}, consume_first)
+
+    size = total[0]
+    if size is not None and size > received[0]:
+        ranges = [(start, min(start + segment_size, size) - 1)
+                  for start in range(received[0], size, segment_size)]
+        parallel = max(1, parallel)
+        with ThreadPoolExecutor(max_workers=parallel) as ex:
+            # не больше parallel сегментов в полёте (и в памяти)
+            pending = iter(ranges)
+            window = deque(ex.submit(fetcher.fetch_range, *r)
+                           for r in islice(pending, parallel))
+            while window:
+                data = window.popleft().result()
+                nxt = next(pending, None)
+                if nxt is not None:
+                    window.append(ex.submit(fetcher.fetch_range, *nxt))
+                if on_read:
+                    on_read(len(data))
+                for h in hashers:
+                    h.update(data)
+
+    return [h.hexdigest() for h in hashers]
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional
+
+from .hashing import HashingError, calculate_many
+from .models import FileEntry, HashAlgo
+from .parsers.common import normalize_expected_checksum
+
+# Формат индекса: отсортированные строки "algo\tdigest\tpath\n" (UTF-8).
+# Алгоритм и digest — ASCII, а '\t' меньше любого печатного символа, поэтому
+# байтовая сортировка строк совпадает с сортировкой по (algo, digest, path),
+# и поиск по ключу делается бинарным поиском по смещениям в файле.
+INDEX_HEADER = b"# file-hash-validator digest index v1\n"
+
+DEFAULT_RUN_SIZE = 1_000_000  # строк в памяти на один отсортированный прогон
+
+Record = tuple[HashAlgo, str, str]
+
+_ESCAPES = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"}
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+
+
+def _escape_path(path: str) -> str:
+    return "".join(_ESCAPES.get(ch, ch) for ch in path)
+
+
+def _unescape_path(s: str) -> str:
+    if "\\" not in s:
+        return s
+    out = []
+    it = iter(s)
+    for ch in it:
+        out.append(_UNESCAPES.get(next(it, ""), "") if ch == "\\" else ch)
+    return "".join(out)
+
+
+def _key(algo: HashAlgo, digest: str) -> bytes:
+    return f"{algo.value}\t{digest}\t".encode("ascii")
+
+
+def _encode(record: Record) -> bytes:
+    algo, digest, path = record
+    return _key(algo, normalize_expected_checksum(algo, digest)) \
+        + _escape_path(path).encode("utf-8", "surrogateescape") + b"\n"
+
+
+def _decode(line: bytes) -> Record:
+    algo, digest, path = line.rstrip(b"\n").decode(
+        "utf-8", "surrogateescape").split("\t", 2)
+    return HashAlgo(algo), digest, _unescape_path(path)
+
+
+def _write_run(lines: list[bytes], directory: Path) -> Path:
+    lines.sort()
+    fd, name = tempfile.mkstemp(prefix=".index-run-", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.writelines(lines)
+    return Path(name)
+
+
+def write_index(records: Iterable[Record], out: Path, *,
+                run_size: int = DEFAULT_RUN_SIZE) -> int:
+    """
+    Строит отсортированный индекс (algo, digest) -> path.
+
+    Сортировка внешняя: записи режутся на отсортированные прогоны по
+    run_size строк во временных файлах рядом с out, затем сливаются
+    heapq.merge. Так индекс на десятки миллионов записей строится без
+    загрузки всего в память. Дубликаты строк отбрасываются.
+    Возвращает число записей в индексе.
+    """
+    directory = out.parent
+    runs: list[Path] = []
+    lines: list[bytes] = []
+    count = 0
+
+    try:
+        for record in records:
+            lines.append(_encode(record))
+            if len(lines) >= run_size:
+                runs.append(_write_run(lines, directory))
+                lines = []
+
+        fd, tmp_name = tempfile.mkstemp(prefix=".index-", dir=directory)
+        files: list[BinaryIO] = [open(run, "rb") for run in runs]
+        try:
+            lines.sort()
+            with os.fdopen(fd, "wb") as f:
+                f.write(INDEX_HEADER)
+                prev = None
+                for line in heapq.merge(lines, *files):
+                    if line != prev:
+                        f.write(line)
+                        count += 1
+                        prev = line
+            os.replace(tmp_name, out)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for run in runs:
+            run.unlink(missing_ok=True)
+
+    return count
+
+
+def records_from_entries(entries: Iterable[FileEntry]) -> Iterator[Record]:
+    """Записи индекса из манифеста (ожидаемые контрольные суммы)."""
+    for entry in entries:
+        yield entry.algo, entry.expected, entry.source
+
+
+def records_from_tree(
+        root: Path,
+        algos: Iterable[HashAlgo],
+        *,
+        on_error: Optional[Callable[[HashingError], None]] = None,
+) -> Iterator[Record]:
+    """
+    Записи индекса по обходу дерева каталогов (считает контрольные суммы).
+    Каждый файл читается один раз для всех алгоритмов.
+    """
+    algos = list(algos)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = Path(dirpath, name)
+            try:
+                digests = calculate_many(path, algos)
+            except HashingError as e:
+                if on_error is not None:
+                    on_error(e)
+                continue
+            for algo, digest in zip(algos, digests):
+                yield algo, digest, str(path)
+
+
+class DigestIndex:
+    """
+    Поиск по индексу, построенному write_index().
+
+    Файл отображается в память, поиск ключа — бинарный поиск по смещениям
+    (O(log N) чтений строк), поэтому индекс не нужно загружать целиком.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            if self._file.read(len(INDEX_HEADER)) != INDEX_HEADER:
+                raise ValueError(f"Файл не является индексом: {path}")
+            size = os.fstat(self._file.fileno()).st_size
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) \
+                if size > len(INDEX_HEADER) else None
+        except BaseException:
+            self._file.close()
+            raise
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self) -> "DigestIndex":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _line_start(self, pos: int) -> int:
+        """Начало первой строки, начинающейся в pos или позже."""
+        start = len(INDEX_HEADER)
+        if pos <= start:
+            return start
+        nl = self._mm.find(b"\n", pos - 1)
+        return len(self._mm) if nl < 0 else nl + 1
+
+    def _line_at(self, pos: int) -> bytes:
+        end = self._mm.find(b"\n", pos)
+        return self._mm[pos:len(self._mm) if end < 0 else end + 1]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = len(INDEX_HEADER), len(self._mm)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._line_start(mid)
+            if start < len(self._mm) and self._line_at(start) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return self._line_start(lo)
+
+    def lookup(self, algo: HashAlgo, digest: str) -> list[str]:
+        """Все пути с данной контрольной суммой."""
+        if self._mm is None:
+            return []
+        key = _key(algo, normalize_expected_checksum(algo, digest))
+        pos = self._lower_bound(key)
+        paths: list[str] = []
+        while pos < len(self._mm):
+            line = self._line_at(pos)
+            if not line.startswith(key):
+                break
+            paths.append(_decode(line)[2])
+            pos += len(line)
+        return paths
+
+    def __iter__(self) -> Iterator[Record]:
+        if self._mm is None:
+            return
+        pos = len(INDEX_HEADER)
+        while pos < len(self._mm):
+            line = self._line_at(pos)
+            yield _decode(line)
+            pos += len(line)
+
+    def duplicates(self) -> Iterator[tuple[HashAlgo, str, list[str]]]:
+        """Группы путей с одинаковым содержимым (одинаковым algo и digest)."""
+        group: list[str] = []
+        current: Optional[tuple[HashAlgo, str]] = None
+        for algo, digest, path in self:
+            if (algo, digest) != current:
+                if current is not None and len(group) > 1:
+                    yield current[0], current[1], group
+                current, group = (algo, digest), []
+            group.append(path)
+        if current is not None and len(group) > 1:
+            yield current[0], current[1], group
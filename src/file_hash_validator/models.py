@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
+from typing import Optional
 
 
 class HashAlgo(str, Enum):
@@ -14,7 +15,20 @@ class HashAlgo(str, Enum):
 
 @dataclass(frozen=True, slots=True)
 class FileEntry:
-    """Одна запись из файл-списка"""
+    """
+    Одна запись из файл-списка.
+    Для HTTP(S)-записей источник — url, а path служит только для отображения.
+    sample — выборочная сумма для быстрой проверки ("8x65536:<hex>"),
+    deep — запись всегда проверяется полным чтением.
+    """
     path: Path
     algo: HashAlgo
     expected: str
+    url: Optional[str] = None
+    sample: Optional[str] = None
+    deep: bool = False
+
+    @property
+    def source(self) -> str:
+        """Откуда читаются данные: URL или путь к файлу."""
+        return self.url if self.url is not None else str(self.path)
@@ -1,8 +1,19 @@
 from __future__ import annotations
 
+import bz2
+import gzip
+import zlib
 from pathlib import Path
+from typing import BinaryIO, Optional
 
+from ..http_source import is_url
 from ..models import FileEntry, HashAlgo
+from ..sampling import parse_sample
+
+try:
+    import lzma
+except ImportError:  # Python может быть собран без lzma
+    lzma = None
 
 
 class ManifestError(Exception):
@@ -15,11 +26,82 @@ class ManifestValidationError(ManifestError):
 
 _HEX_CHARS = set("0123456789abcdef")
 
+# Сжатые манифесты (manifest.json.gz, manifest.xml.xz, ...) распаковываются
+# потоком при чтении. Сжатие определяется по сигнатуре, а не по расширению.
+_COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+_COMPRESSION_OPENERS = {"gzip": gzip.open, "bz2": bz2.open}
+if lzma is not None:
+    _COMPRESSION_OPENERS["xz"] = lzma.open
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".gzip": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+# ошибки чтения и распаковки (в т.ч. повреждённый или обрезанный архив)
+_DECOMPRESS_ERRORS: tuple[type[BaseException], ...] = (
+    EOFError,
+    zlib.error,
+) + ((lzma.LZMAError,) if lzma is not None else ())
+READ_ERRORS = (OSError, *_DECOMPRESS_ERRORS)
+
+MANIFEST_FORMATS = ("json", "xml")
+_SNIFF_LIMIT = 64 * 1024
+
 
 def _is_hex(s: str) -> bool:
     return all(ch in _HEX_CHARS for ch in s)
 
 
+def detect_compression(path: Path) -> Optional[str]:
+    """Сжатие файла по сигнатуре: 'gzip', 'bz2', 'xz' или None."""
+    with path.open("rb") as f:
+        head = f.read(6)
+    for magic, name in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_manifest(path: Path) -> BinaryIO:
+    """
+    Открывает манифест для чтения, распаковывая на лету, если он сжат.
+    Сжатие, модуль которого недоступен (Python без lzma), — ManifestError.
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return path.open("rb")
+    opener = _COMPRESSION_OPENERS.get(compression)
+    if opener is None:
+        raise ManifestError(
+            f"Сжатие {compression} не поддерживается этой сборкой Python: {path}")
+    return opener(path, "rb")
+
+
+def manifest_format(path: Path) -> Optional[str]:
+    """
+    Формат манифеста ('json' или 'xml'): по расширению без суффикса сжатия
+    (manifest.json.gz -> json), а при неизвестном расширении — по первому
+    значащему символу распакованного содержимого. None — не определён.
+    """
+    suffixes = [s.lower() for s in path.suffixes]
+    if suffixes and suffixes[-1] in COMPRESSION_SUFFIXES:
+        suffixes.pop()
+    if suffixes and suffixes[-1].lstrip(".") in MANIFEST_FORMATS:
+        return suffixes[-1].lstrip(".")
+
+    try:
+        with open_manifest(path) as f:
+            head = f.read(_SNIFF_LIMIT).lstrip(b"\xef\xbb\xbf \t\r\n")
+    except _DECOMPRESS_ERRORS as e:
+        raise ManifestError(f"Не удалось распаковать файл: {path} ({e})") from e
+    if head[:1] in (b"{", b"["):
+        return "json"
+    if head[:1] == b"<":
+        return "xml"
+    return None
+
+
 def normalize_expected_checksum(algo: HashAlgo, value: str) -> str:
     """
     Нормализуем контрольную сумму:
@@ -75,12 +157,43 @@ def parse_algo(value: object) -> HashAlgo:
         ) from e
 
 
+def parse_sample_field(algo: HashAlgo, value: object) -> str:
+    """Проверяем необязательное поле 'sample' ("<блоков>x<размер>:<hex>")."""
+    if not isinstance(value, str):
+        raise ManifestValidationError("Поле 'sample' должно быть строкой")
+    try:
+        spec = parse_sample(value)
+    except ValueError as e:
+        raise ManifestValidationError(f"Некорректное поле 'sample': {e}") from e
+    digest = normalize_expected_checksum(algo, spec.digest)
+    return f"{spec.blocks}x{spec.block_size}:{digest}"
+
+
+_TRUE_VALUES = {"true", "1", "yes"}
+_FALSE_VALUES = {"false", "0", "no"}
+
+
+def parse_flag(name: str, value: object) -> bool:
+    """Булево поле: JSON true/false или строка true/false/1/0/yes/no (XML)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        s = value.strip().lower()
+        if s in _TRUE_VALUES:
+            return True
+        if s in _FALSE_VALUES:
+            return False
+    raise ManifestValidationError(f"Поле '{name}' должно быть true или false")
+
+
 def parse_entry(obj: object, workdir: Path) -> FileEntry:
     """
     Валидация и преобразование одной записи:
     - obj должен быть словарём
     - path/hash_type/hash обязательны
     - path резолвится относительно workdir, если он относительный
+    - http:// и https:// пути сохраняются как URL
+    - sample/deep необязательны (быстрая проверка по выборке)
     """
     if not isinstance(obj, dict):
         raise ManifestValidationError(
@@ -100,9 +213,19 @@ def parse_entry(obj: object, workdir: Path) -> FileEntry:
     algo = parse_algo(obj["hash_type"])
     expected = normalize_expected_checksum(algo, obj["hash"])
 
-    p = Path(path_value.strip())
+    sample = obj.get("sample")
+    if sample is not None:
+        sample = parse_sample_field(algo, sample)
+    deep = parse_flag("deep", obj.get("deep", False))
+
+    value = path_value.strip()
+    if is_url(value):
+        return FileEntry(path=Path(value), algo=algo, expected=expected, url=value,
+                         sample=sample, deep=deep)
+
+    p = Path(value)
 
     if not p.is_absolute():
         p = (workdir / p)
 
-    return FileEntry(path=p, algo=algo, expected=expected)
+    return FileEntry(path=p, algo=algo, expected=expected, sample=sample, deep=deep)
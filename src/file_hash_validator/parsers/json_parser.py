@@ -4,22 +4,27 @@ import json
 from pathlib import Path
 
 from ..models import FileEntry
-from .common import ManifestError, ManifestValidationError, parse_entry
+from .common import (
+    READ_ERRORS,
+    ManifestError,
+    ManifestValidationError,
+    open_manifest,
+    parse_entry,
+)
 
 
 def load_json_manifest(manifest_path: Path, workdir: Path) -> list[FileEntry]:
     """
-    Загружает JSON Файл-спсико и возращает список FileEntry
+    Загружает JSON Файл-спсико и возращает список FileEntry.
+    Сжатый файл (gzip, bz2, xz) распаковывается на лету.
     """
 
     try:
-        text = manifest_path.read_text(encoding="utf-8")
-    except OSError as e:
+        with open_manifest(manifest_path) as f:
+            data = json.load(f)
+    except READ_ERRORS as e:
         raise ManifestError(
             f"Не удалось прочитать файл: {manifest_path}") from e
-
-    try:
-        data = json.loads(text)
     except json.JSONDecodeError as e:
         raise ManifestError(f"Некорректный JSON: {e}") from e
 
@@ -4,7 +4,13 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 
 from ..models import FileEntry
-from .common import ManifestError, ManifestValidationError, parse_entry
+from .common import (
+    READ_ERRORS,
+    ManifestError,
+    ManifestValidationError,
+    open_manifest,
+    parse_entry,
+)
 
 
 def _get_required_text(parent: ET.Element, tag: str) -> str:
@@ -23,15 +29,14 @@ def _get_required_text(parent: ET.Element, tag: str) -> str:
 def load_xml_manifest(manifest_path: Path, workdir: Path) -> list[FileEntry]:
     """
     Загружает XML файл-список и возвращает список FileEntry.
+    Сжатый файл (gzip, bz2, xz) распаковывается на лету.
     """
     try:
-        text = manifest_path.read_text(encoding="utf-8")
-    except OSError as e:
+        with open_manifest(manifest_path) as f:
+            root = ET.parse(f).getroot()
+    except READ_ERRORS as e:
         raise ManifestError(
             f"Не удалось прочитать файл: {manifest_path}") from e
-
-    try:
-        root = ET.fromstring(text)
     except ET.ParseError as e:
         raise ManifestError(f"Некорректный XML: {e}") from e
 
@@ -54,6 +59,10 @@ def load_xml_manifest(manifest_path: Path, workdir: Path) -> list[FileEntry]:
 
             # Приводим XML-запись к виду, который понимает общий валидатор
             obj = {"path": path, "hash_type": hash_type, "hash": checksum}
+            for tag in ("sample", "deep"):
+                child = file_el.find(tag)
+                if child is not None:
+                    obj[tag] = (child.text or "").strip()
 
             result.append(parse_entry(obj, workdir=workdir))
         except ManifestValidationError as e:
@@ -4,7 +4,7 @@ import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, TextIO
+from typing import Callable, Optional, TextIO
 
 
 def _fmt_bytes(n: int) -> str:
@@ -26,11 +26,13 @@ class Progress:
     Простой консольный прогресс:
       - всегда: "проверено N из M"
       - опционально: прогресс байт по текущему файлу (если размер известен)
+      - опционально: доп. статус (например, скорость относительно лимита)
     """
     total_files: int
     stream: TextIO = sys.stderr
     enabled: bool = True
     min_interval_sec: float = 0.08  # анти-спам в консоль
+    status: Optional[Callable[[], str]] = None
 
     checked_files: int = 0
     current_file: Optional[Path] = None
@@ -42,8 +44,10 @@ class Progress:
 
     @classmethod
     def from_entries(cls, total_files: int, *, stream: TextIO = sys.stderr,
-                     enabled: bool = True) -> "Progress":
-        return cls(total_files=total_files, stream=stream, enabled=enabled)
+                     enabled: bool = True,
+                     status: Optional[Callable[[], str]] = None) -> "Progress":
+        return cls(total_files=total_files, stream=stream, enabled=enabled,
+                   status=status)
 
     def start(self) -> None:
         if not self.enabled:
@@ -58,6 +62,13 @@ class Progress:
             return
         self._draw(force=True)
 
+    def size_known(self, size: int) -> None:
+        """Размер текущего файла стал известен уже после начала (например, HTTP)."""
+        self.current_size = size if size >= 0 else None
+        if not self.enabled:
+            return
+        self._draw(force=True)
+
     def bytes_advanced(self, n: int) -> None:
         if n > 0:
             self.current_read += n
@@ -74,6 +85,13 @@ class Progress:
             return
         self._draw(force=True)
 
+    def files_finished(self, n: int) -> None:
+        """Завершена пачка из n файлов (пакетная проверка без прогресса байт)."""
+        self.checked_files += n
+        if not self.enabled:
+            return
+        self._draw()
+
     def finish(self) -> None:
         if not self.enabled:
             return
@@ -100,6 +118,9 @@ class Progress:
                 # размер 0 — показываем 100% сразу
                 detail = " | 100% (0 B / 0 B)"
 
+        if self.status is not None:
+            detail += f" | {self.status()}"
+
         text = base + detail
 
         # Каретка: обновляем одну строку
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import os
+import random
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional, Union
+
+from .hashing import (
+    DEFAULT_CHUNK_SIZE,
+    _io_error,
+    _normalize_algo,
+    new_hasher,
+    open_for_hashing,
+)
+from .models import HashAlgo
+
+# Выборочная («быстрая») контрольная сумма: голова, хвост и N блоков
+# по псевдослучайным смещениям с фиксированным seed. Параметры выборки
+# хранятся вместе с суммой в поле манифеста 'sample': "8x65536:<hex>",
+# чтобы проверка всегда читала те же блоки, что и генерация.
+DEFAULT_SAMPLE_BLOCKS = 8
+DEFAULT_SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_SEED = 0x5A3D1E
+
+_SAMPLE_RE = re.compile(r"^(\d+)x(\d+):([0-9a-f]+)$")
+
+
+@dataclass(frozen=True, slots=True)
+class SampleSpec:
+    blocks: int
+    block_size: int
+    digest: str
+
+    def __str__(self) -> str:
+        return f"{self.blocks}x{self.block_size}:{self.digest}"
+
+
+def parse_sample(value: str) -> SampleSpec:
+    """Разбирает значение поля 'sample'. Некорректный формат — ValueError."""
+    m = _SAMPLE_RE.match(value.strip().lower())
+    if m is None:
+        raise ValueError("ожидается формат '<блоков>x<размер блока>:<hex>'")
+    blocks, block_size = int(m.group(1)), int(m.group(2))
+    if block_size < 1:
+        raise ValueError("размер блока должен быть больше нуля")
+    return SampleSpec(blocks, block_size, m.group(3))
+
+
+def sample_offsets(size: int, blocks: int, block_size: int) -> list[int]:
+    """
+    Смещения блоков выборки для файла размера size (отсортированы, без повторов).
+    Маленький файл (не больше blocks + 2 блоков) покрывается целиком.
+    """
+    if size <= (blocks + 2) * block_size:
+        return list(range(0, size, block_size))
+
+    last = size - block_size
+    rng = random.Random(SAMPLE_SEED ^ size)
+    offsets = {0, last}
+    offsets.update(rng.randrange(0, last + 1) for _ in range(blocks))
+    return sorted(offsets)
+
+
+class SampleCollector:
+    """
+    Собирает блоки выборки из последовательного потока данных,
+    чтобы выборочная сумма считалась в том же проходе, что и полная.
+    """
+
+    def __init__(self, algo: HashAlgo, size: int, blocks: int = DEFAULT_SAMPLE_BLOCKS,
+                 block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE) -> None:
+        self.algo = algo
+        self.size = size
+        self.blocks = blocks
+        self.block_size = block_size
+        self._ranges = [(off, min(off + block_size, size))
+                        for off in sample_offsets(size, blocks, block_size)]
+        self._parts = [bytearray() for _ in self._ranges]
+        self._pos = 0
+
+    @property
+    def complete(self) -> bool:
+        """Поток дочитан ровно до размера файла."""
+        return self._pos == self.size
+
+    def feed(self, chunk: bytes) -> None:
+        start, end = self._pos, self._pos + len(chunk)
+        self._pos = end
+        for (lo, hi), part in zip(self._ranges, self._parts):
+            if lo < end and hi > start:
+                part += chunk[max(lo, start) - start:min(hi, end) - start]
+
+    def spec(self) -> SampleSpec:
+        return SampleSpec(self.blocks, self.block_size,
+                          _sample_digest(self.algo, self.size, self._parts))
+
+
+def _sample_digest(algo: HashAlgo, size: int, parts: Iterable[bytes]) -> str:
+    # размер входит в сумму: усечённый/дописанный файл не совпадёт по выборке
+    h = new_hasher(algo)
+    h.update(size.to_bytes(8, "little"))
+    for part in parts:
+        h.update(part)
+    return h.hexdigest()
+
+
+def _read_at(f: BinaryIO, offset: int, n: int) -> bytes:
+    # FUSE и сетевые ФС могут вернуть меньше запрошенного: дочитываем до n или EOF
+    data = b""
+    while len(data) < n:
+        pos = offset + len(data)
+        if hasattr(os, "pread"):
+            more = os.pread(f.fileno(), n - len(data), pos)
+        else:
+            f.seek(pos)
+            more = f.read(n - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def calculate_sample(
+        path: Union[Path, str],
+        algo: Union[HashAlgo, str],
+        *,
+        blocks: int = DEFAULT_SAMPLE_BLOCKS,
+        block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE,
+        on_read: Callable[[int], None] | None = None,
+        dir_fd: int | None = None,
+) -> SampleSpec:
+    """
+    Считает выборочную сумму, читая только блоки выборки.
+    Ошибки доступа оборачиваются в HashingError, как в calculate().
+    """
+    p = path if isinstance(path, Path) else Path(path)
+    a = _normalize_algo(algo)
+
+    fd, st = open_for_hashing(p, dir_fd)
+    size = st.st_size
+
+    try:
+        with open(fd, "rb", buffering=0) as f:
+            parts = []
+            for off in sample_offsets(size, blocks, block_size):
+                data = _read_at(f, off, min(block_size, size - off))
+                if on_read:
+                    on_read(len(data))
+                parts.append(data)
+            return SampleSpec(blocks, block_size, _sample_digest(a, size, parts))
+
+    except OSError as e:
+        raise _io_error(p, e) from e
+
+
+def calculate_with_sample(
+        path: Union[Path, str],
+        algo: Union[HashAlgo, str],
+        *,
+        blocks: int = DEFAULT_SAMPLE_BLOCKS,
+        block_size: int = DEFAULT_SAMPLE_BLOCK_SIZE,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[str, Optional[SampleSpec]]:
+    """
+    Полная и выборочная суммы за один последовательный проход.
+    Если файл изменился во время чтения, выборочная сумма не возвращается.
+    """
+    p = path if isinstance(path, Path) else Path(path)
+    a = _normalize_algo(algo)
+
+    fd, st = open_for_hashing(p)
+    size = st.st_size
+
+    try:
+        with open(fd, "rb", buffering=0) as f:
+            h = new_hasher(a)
+            collector = SampleCollector(a, size, blocks, block_size)
+            while chunk := f.read(chunk_size):
+                h.update(chunk)
+                collector.feed(chunk)
+            sample = collector.spec() if collector.complete else None
+            return h.hexdigest(), sample
+
+    except OSError as e:
+        raise _io_error(p, e) from e
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from .checker import CheckResult, check_entries
+from .models import FileEntry
+
+STATE_VERSION = 2
+# версия 1 хранила только время успешной проверки ("entries")
+_LEGACY_STATE_VERSION = 1
+STATE_SAVE_INTERVAL_SEC = 60.0
+
+COVERAGE_PERCENTILES = (50, 90, 99, 100)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)([smhd]?)")
+_DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class ScrubStateError(Exception):
+    """Файл состояния повреждён или имеет неизвестный формат."""
+
+
+def parse_duration(value: str) -> float:
+    """Длительность: '2h', '90m', '1h30m', '45s', '1d', '3600' (секунды)."""
+    s = value.strip().lower().replace(" ", "")
+    pos = 0
+    total = 0.0
+    for m in _DURATION_RE.finditer(s):
+        if m.start() != pos:
+            break
+        total += float(m.group(1)) * _DURATION_UNITS[m.group(2)]
+        pos = m.end()
+    if not s or pos != len(s):
+        raise ValueError(f"Некорректная длительность: {value!r}")
+    if total <= 0:
+        raise ValueError(f"Длительность должна быть больше нуля: {value!r}")
+    return total
+
+
+def entry_key(entry: FileEntry) -> str:
+    """Ключ записи в файле состояния: алгоритм и источник."""
+    return f"{entry.algo.value}:{entry.source}"
+
+
+@dataclass(slots=True)
+class ScrubState:
+    """Время проверок по ключам записей (entry_key)."""
+    verified: dict[str, float] = field(default_factory=dict)  # последняя успешная
+    attempted: dict[str, float] = field(default_factory=dict)  # последняя любая
+
+    def prune(self, keys: set[str]) -> None:
+        """Удаляет записи, которых больше нет в манифесте."""
+        self.verified = {k: v for k, v in self.verified.items() if k in keys}
+        self.attempted = {k: v for k, v in self.attempted.items() if k in keys}
+
+
+def _times(data: object) -> Optional[dict[str, float]]:
+    if not isinstance(data, dict):
+        return None
+    return {str(k): float(v) for k, v in data.items() if isinstance(v, (int, float))}
+
+
+def load_state(path: Path) -> ScrubState:
+    """
+    Время последней успешной проверки и последней попытки по ключам записей.
+    Нет файла — пустое состояние. В состоянии версии 1 (только успешные
+    проверки) время попытки совпадает со временем успешной проверки.
+    """
+    try:
+        text = path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ScrubState()
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ScrubStateError(f"Некорректный JSON состояния: {e}") from e
+
+    version = data.get("version") if isinstance(data, dict) else None
+    if version == _LEGACY_STATE_VERSION:
+        verified = _times(data.get("entries"))
+        if verified is not None:
+            return ScrubState(verified, dict(verified))
+    elif version == STATE_VERSION:
+        verified = _times(data.get("verified"))
+        attempted = _times(data.get("attempted"))
+        if verified is not None and attempted is not None:
+            return ScrubState(verified, attempted)
+    raise ScrubStateError(f"Неизвестный формат файла состояния: {path}")
+
+
+def save_state(path: Path, state: ScrubState) -> None:
+    """Атомарная запись состояния (через временный файл и os.replace)."""
+    payload: dict[str, Any] = {"version": STATE_VERSION,
+                               "verified": state.verified,
+                               "attempted": state.attempted}
+    fd, tmp_name = tempfile.mkstemp(prefix=".scrub-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def order_by_staleness(entries: Sequence[FileEntry],
+                       state: ScrubState) -> list[FileEntry]:
+    """
+    Сначала ни разу не проверявшиеся, затем по давности последней попытки
+    (порядок стабилен). Записи с ошибкой или несовпадением встают в конец
+    очереди вместе с успешными и не съедают бюджет каждого запуска.
+    """
+    return sorted(entries,
+                  key=lambda e: state.attempted.get(entry_key(e), -math.inf))
+
+
+def coverage_ages(entries: Sequence[FileEntry], state: dict[str, float],
+                  now: float) -> dict[int, Optional[float]]:
+    """
+    Перцентили «возраста» проверки по всем записям манифеста (секунды).
+    None — перцентиль приходится на записи, которые ещё ни разу не проверялись.
+    """
+    ages = sorted(now - state[k] if k in state else math.inf
+                  for k in map(entry_key, entries))
+    result: dict[int, Optional[float]] = {}
+    for pct in COVERAGE_PERCENTILES:
+        if not ages:
+            result[pct] = None
+            continue
+        # nearest-rank
+        rank = max(1, math.ceil(pct / 100 * len(ages)))
+        age = ages[rank - 1]
+        result[pct] = None if math.isinf(age) else age
+    return result
+
+
+@dataclass(frozen=True, slots=True)
+class ScrubReport:
+    result: CheckResult  # только записи, проверенные в этом запуске
+    remaining: int  # не успели проверить в этот запуск
+    never_verified: int  # ни разу не проверены успешно (после запуска)
+    ages: dict[int, Optional[float]]
+
+
+def scrub(
+        entries: Sequence[FileEntry],
+        state_path: Path,
+        budget_sec: float,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        wall_clock: Callable[[], float] = time.time,
+        **check_kwargs: Any,
+) -> ScrubReport:
+    """
+    Проверка в пределах бюджета времени: самые «несвежие» записи первыми.
+
+    Очередь проверяется одним вызовом check_entries с preserve_order (пулы
+    потоков и соединений общие на весь запуск); оставшееся время сверяется
+    перед каждой записью, так что бюджет превышается не больше чем на время
+    проверки одного файла (на воркер). В файл состояния записывается
+    время каждой попытки и отдельно — успешной проверки: записи с ошибкой
+    чтения или несовпадением попадают в результат и считаются не
+    проверенными успешно, но в очереди уходят в конец, как и остальные.
+    Состояние сохраняется периодически и в конце.
+    Записи, которых больше нет в манифесте, из состояния удаляются.
+    """
+    state = load_state(state_path)
+    keys = {entry_key(e) for e in entries}
+    state.prune(keys)
+
+    queue = order_by_staleness(entries, state)
+    start = clock()
+    deadline = start + budget_sec
+    next_save = start + STATE_SAVE_INTERVAL_SEC
+
+    def out_of_budget() -> bool:
+        return clock() >= deadline
+
+    def on_result(entry: FileEntry, ok: bool) -> None:
+        nonlocal next_save
+        key = entry_key(entry)
+        now = state.attempted[key] = wall_clock()
+        if ok:
+            state.verified[key] = now
+        if clock() >= next_save:
+            save_state(state_path, state)
+            next_save = clock() + STATE_SAVE_INTERVAL_SEC
+
+    check_kwargs.setdefault("progress_enabled", False)
+    try:
+        result = check_entries(queue, stop=out_of_budget, on_result=on_result,
+                               preserve_order=True, **check_kwargs)
+    finally:
+        save_state(state_path, state)
+
+    never = sum(1 for k in keys if k not in state.verified)
+    return ScrubReport(
+        result=result,
+        remaining=len(queue) - result.total,
+        never_verified=never,
+        ages=coverage_ages(entries, state.verified, wall_clock()),
+    )
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from .progress import _fmt_bytes
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+# как часто (не чаще) проверять mtime файла управления
+CONTROL_POLL_INTERVAL_SEC = 1.0
+
+# скорость относительно лимита считается за последние RATE_WINDOW_SEC секунд,
+# чтобы после смены лимита не смешивать старую и новую скорость
+RATE_WINDOW_SEC = 10.0
+_RATE_SAMPLE_SEC = 1.0
+
+
+def parse_rate(value: str) -> Optional[float]:
+    """
+    Разбирает лимит: '50M', '1.5G', '512K', '1000', '50MiB/s'.
+    Суффиксы двоичные (K = 1024). '0', 'none', 'unlimited' и пустая
+    строка — без ограничения (None).
+    """
+    s = value.strip().upper().replace(" ", "")
+    if s in ("", "0", "NONE", "UNLIMITED"):
+        return None
+    for tail in ("/S", "IB", "B"):
+        if s.endswith(tail):
+            s = s[:-len(tail)]
+    unit = s[-1] if s and s[-1] in _SIZE_UNITS else ""
+    number = s[:-1] if unit else s
+    try:
+        rate = float(number) * _SIZE_UNITS[unit]
+    except ValueError as e:
+        raise ValueError(f"Некорректное значение лимита: {value!r}") from e
+    # nan отключил бы ведро (сравнения с nan ложны), inf — тоже не лимит
+    if not math.isfinite(rate):
+        raise ValueError(f"Некорректное значение лимита: {value!r}")
+    if rate < 0:
+        raise ValueError(f"Лимит не может быть отрицательным: {value!r}")
+    return rate or None
+
+
+def parse_size(value: str) -> int:
+    """
+    Разбирает размер в байтах: '64K', '1M', '4096', '2MiB'.
+    Суффиксы двоичные (K = 1024), число только целое и положительное.
+    """
+    s = value.strip().upper().replace(" ", "")
+    for tail in ("IB", "B"):
+        if s.endswith(tail):
+            s = s[:-len(tail)]
+            break
+    unit = s[-1] if s and s[-1] in _SIZE_UNITS else ""
+    number = s[:-1] if unit else s
+    if not number.isdigit() or not number.isascii():
+        raise ValueError(f"Некорректный размер: {value!r}")
+    size = int(number) * _SIZE_UNITS[unit]
+    if size <= 0:
+        raise ValueError(f"Размер должен быть положительным: {value!r}")
+    return size
+
+
+class TokenBucket:
+    """
+    Потокобезопасное «ведро токенов».
+
+    consume(n) резервирует n токенов и при нехватке спит столько, сколько
+    нужно для их накопления. Запросы больше ёмкости ведра допускаются
+    (уходим «в долг»), поэтому крупный chunk не блокирует навсегда.
+    rate=None — без ограничения.
+    """
+
+    def __init__(self, rate: Optional[float], *, burst_sec: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._burst_sec = burst_sec
+        self.rate: Optional[float] = None
+        self._tokens = 0.0
+        self._last = clock()
+        self.set_rate(rate)
+
+    @property
+    def capacity(self) -> float:
+        return (self.rate or 0.0) * self._burst_sec
+
+    def set_rate(self, rate: Optional[float]) -> None:
+        with self._lock:
+            self.rate = rate if rate else None
+            self._last = self._clock()
+            self._tokens = min(self._tokens, self.capacity)
+
+    def consume(self, n: float) -> None:
+        if n <= 0:
+            return
+        with self._lock:
+            if self.rate is None:
+                return
+            now = self._clock()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= n
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+
+
+class Throttle:
+    """
+    Ограничение скорости чтения (байт/с) и частоты открытия файлов
+    (файлов/с), общее для всех воркеров.
+
+    Лимиты можно менять на лету через файл управления со строками вида
+        max_bandwidth = 50M
+        max_files_per_sec = 200
+    Файл перечитывается при изменении mtime или по request_reload()
+    (например, из обработчика SIGHUP).
+
+    share — на сколько процессов делятся лимиты: каждому достаётся
+    1/share от заданного (и в аргументах, и в файле управления).
+    """
+
+    def __init__(self, max_bandwidth: Optional[float] = None,
+                 max_files_per_sec: Optional[float] = None, *,
+                 control_file: Optional[Path] = None,
+                 share: int = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        if share < 1:
+            raise ValueError("share должен быть >= 1")
+        self._clock = clock
+        self.share = share
+        self.bandwidth = TokenBucket(self._part(max_bandwidth), clock=clock,
+                                     sleep=sleep)
+        self.files = TokenBucket(self._part(max_files_per_sec), clock=clock,
+                                 sleep=sleep)
+        self.control_file = control_file
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.bytes_read = 0
+        self.files_opened = 0
+        # (время, bytes_read, files_opened) не реже раза в _RATE_SAMPLE_SEC
+        self._samples: deque[tuple[float, int, int]] = deque([(clock(), 0, 0)])
+
+        self._control_mtime: Optional[float] = None
+        self._next_poll = 0.0
+        self._reload_requested = False
+        self.maybe_reload()
+
+    def _part(self, rate: Optional[float]) -> Optional[float]:
+        return rate / self.share if rate else None
+
+    @property
+    def enabled(self) -> bool:
+        return (self.bandwidth.rate is not None or self.files.rate is not None
+                or self.control_file is not None)
+
+    def request_reload(self) -> None:
+        """Перечитать файл управления при следующем обращении."""
+        self._reload_requested = True
+
+    def maybe_reload(self) -> None:
+        if self.control_file is None:
+            return
+        # перечитывает один поток, остальные не ждут
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._reload()
+        finally:
+            self._reload_lock.release()
+
+    def _reload(self) -> None:
+        now = self._clock()
+        if not self._reload_requested and now < self._next_poll:
+            return
+        self._next_poll = now + CONTROL_POLL_INTERVAL_SEC
+        force, self._reload_requested = self._reload_requested, False
+
+        try:
+            mtime = self.control_file.stat().st_mtime
+            if not force and mtime == self._control_mtime:
+                return
+            text = self.control_file.read_text(encoding="utf-8")
+        except OSError:
+            # файла нет или он недоступен — оставляем текущие лимиты
+            return
+
+        self._control_mtime = mtime
+        self._apply_control(text)
+
+    def _apply_control(self, text: str) -> None:
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line or "=" not in line:
+                continue
+            key, value = (part.strip() for part in line.split("=", 1))
+            try:
+                rate = parse_rate(value)
+            except ValueError:
+                continue
+            if key == "max_bandwidth":
+                self.bandwidth.set_rate(self._part(rate))
+            elif key == "max_files_per_sec":
+                self.files.set_rate(self._part(rate))
+
+    def _sample(self, now: float) -> None:
+        # вызывается под self._lock; первый отсчёт — последний не новее окна
+        if now - self._samples[-1][0] >= _RATE_SAMPLE_SEC:
+            self._samples.append((now, self.bytes_read, self.files_opened))
+        while len(self._samples) > 1 and now - self._samples[1][0] >= RATE_WINDOW_SEC:
+            self._samples.popleft()
+
+    def file_opened(self) -> None:
+        self.maybe_reload()
+        with self._lock:
+            self.files_opened += 1
+            self._sample(self._clock())
+        self.files.consume(1)
+
+    def bytes_read_chunk(self, n: int) -> None:
+        # новые лимиты применяются и посреди чтения большого файла
+        self.maybe_reload()
+        with self._lock:
+            self.bytes_read += n
+            self._sample(self._clock())
+        self.bandwidth.consume(n)
+
+    def throughput(self) -> tuple[float, float]:
+        """Средние (байт/с, файлов/с) примерно за последние RATE_WINDOW_SEC."""
+        with self._lock:
+            now = self._clock()
+            self._sample(now)
+            since, read, opened = self._samples[0]
+            elapsed = max(now - since, 1e-9)
+            return (self.bytes_read - read) / elapsed, \
+                (self.files_opened - opened) / elapsed
+
+    def describe(self) -> str:
+        """Текущая скорость относительно лимитов, для прогресса и итогов."""
+        bps, fps = self.throughput()
+        bw_cap = self.bandwidth.rate
+        f_cap = self.files.rate
+        bw = f"{_fmt_bytes(int(bps))}/s"
+        if bw_cap:
+            bw += f" из {_fmt_bytes(int(bw_cap))}/s"
+        files = f"{fps:.1f} файл/с"
+        if f_cap:
+            files += f" из {f_cap:g}"
+        return f"{bw}, {files}"
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.archives import split_archive_path
+from file_hash_validator.checker import check_entries
+from file_hash_validator.models import FileEntry, HashAlgo
+
+HELLO_MD5 = "5d41402abc4b2a76b9719d911017c592"
+HELLO_CRC32 = "3610a686"
+
+
+def _make_tar(path: Path, members: dict[str, bytes]) -> Path:
+    """Создаёт tar.gz архив с указанными членами."""
+    with tarfile.open(path, "w:gz") as tf:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+def _make_zip(path: Path, members: dict[str, bytes]) -> Path:
+    """Создаёт zip архив с указанными членами."""
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return path
+
+
+def test_split_archive_path() -> None:
+    """Путь с '!' разбивается на архив и имя члена."""
+    assert split_archive_path(Path("dir/bundle.tar.gz!/lib/x.so")) == (
+        Path("dir/bundle.tar.gz"), "lib/x.so")
+    assert split_archive_path(Path("dir/file.txt")) is None
+
+
+@pytest.mark.parametrize("make, name", [(_make_tar, "b.tar.gz"),
+                                        (_make_zip, "b.zip")])
+def test_check_entries_inside_archive(tmp_path: Path, make, name) -> None:
+    """Члены tar/zip проверяются без распаковки, в т.ч. несколькими алгоритмами."""
+    archive = make(tmp_path / name, {"./lib/hello.txt": b"hello",
+                                     "other.txt": b"other"})
+    prefix = f"{archive}!"
+    entries = [
+        FileEntry(Path(prefix, "lib/hello.txt"), HashAlgo.MD5, HELLO_MD5),
+        FileEntry(Path(prefix, "lib/hello.txt"), HashAlgo.CRC32, HELLO_CRC32),
+        FileEntry(Path(prefix, "other.txt"), HashAlgo.MD5, HELLO_MD5),
+        FileEntry(Path(prefix, "missing.txt"), HashAlgo.MD5, HELLO_MD5),
+    ]
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.total == 4
+    assert result.ok == 2
+    assert [e.path.name for e, _ in result.mismatched] == ["other.txt"]
+    assert len(result.read_errors) == 1
+    assert "не найден в архиве" in str(result.read_errors[0][1])
+
+
+def test_check_entries_missing_archive(tmp_path: Path) -> None:
+    """Отсутствующий архив даёт ошибку чтения для каждой его записи."""
+    entries = [FileEntry(tmp_path / "none.tar!" / "a.txt", HashAlgo.MD5, HELLO_MD5),
+               FileEntry(tmp_path / "none.tar!" / "b.txt", HashAlgo.MD5, HELLO_MD5)]
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.ok == 0
+    assert len(result.read_errors) == 2
+    assert all("Архив не найден" in str(err) for _, err in result.read_errors)
+
+
+def test_truncated_tar_reports_read_error(tmp_path: Path) -> None:
+    """После обрыва tar посреди члена остальные записи получают ошибку чтения архива."""
+    archive = tmp_path / "t.tar"
+    with tarfile.open(archive, "w") as tf:
+        for name in ("a", "b", "c"):
+            data = name.encode() * 100_000
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    archive.write_bytes(archive.read_bytes()[:50_000])
+
+    entries = [FileEntry(Path(f"{archive}!", name), HashAlgo.MD5, HELLO_MD5)
+               for name in ("a", "b", "c")]
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.ok == 0
+    assert len(result.read_errors) == 3
+    for entry, err in result.read_errors:
+        assert err.message == "Ошибка чтения архива", entry
+
+
+def _patch_central_dir(path: Path, name: bytes, offset: int, value: int) -> None:
+    """Меняет 2-байтовое поле записи центрального каталога zip для члена name."""
+    data = bytearray(path.read_bytes())
+    pos = 0
+    while (pos := data.find(b"PK\x01\x02", pos)) != -1:
+        if data[pos + 46:pos + 46 + len(name)] == name:
+            data[pos + offset:pos + offset + 2] = value.to_bytes(2, "little")
+        pos += 4
+    path.write_bytes(bytes(data))
+
+
+@pytest.mark.parametrize("offset, value", [(8, 0x1), (10, 99)])
+def test_unreadable_zip_member_does_not_stop_archive(tmp_path: Path, offset: int,
+                                                     value: int) -> None:
+    """Зашифрованный член или неизвестный метод сжатия — ошибка только этого члена."""
+    archive = _make_zip(tmp_path / "b.zip", {"bad.txt": b"hello", "ok.txt": b"hello"})
+    _patch_central_dir(archive, b"bad.txt", offset, value)
+    entries = [FileEntry(Path(f"{archive}!", name), HashAlgo.MD5, HELLO_MD5)
+               for name in ("bad.txt", "ok.txt")]
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.ok == 1
+    [(entry, err)] = result.read_errors
+    assert entry.path.name == "bad.txt"
+    assert err.message == "Не удалось открыть файл в архиве"
+
+
+def test_directory_with_marker_is_plain_path(tmp_path: Path) -> None:
+    """Каталог с '!' в имени не считается архивом."""
+    directory = tmp_path / "wow!"
+    directory.mkdir()
+    (directory / "f.txt").write_bytes(b"hello")
+
+    assert split_archive_path(directory / "f.txt") is None
+    assert split_archive_path(tmp_path / "missing.zip!" / "f.txt") == (
+        tmp_path / "missing.zip", "f.txt")
+
+    entries = [FileEntry(directory / "f.txt", HashAlgo.MD5, HELLO_MD5)]
+    assert check_entries(entries, progress_enabled=False).ok == 1
+
+
+def _make_tar_with_links(path: Path) -> Path:
+    """tar с обычным файлом, жёсткой и символьной ссылкой и каталогом."""
+    with tarfile.open(path, "w") as tf:
+        for name, kind, link in (("lib", tarfile.DIRTYPE, ""),
+                                 ("lib/x.so", tarfile.REGTYPE, ""),
+                                 ("lib/y.so", tarfile.LNKTYPE, "lib/x.so"),
+                                 ("lib/v.so", tarfile.LNKTYPE, "./lib/x.so"),
+                                 ("lib/z.so", tarfile.SYMTYPE, "x.so"),
+                                 ("lib/w.so", tarfile.LNKTYPE, "lib/gone.so")):
+            info = tarfile.TarInfo(name)
+            info.type = kind
+            info.linkname = link
+            data = b"hello" if kind == tarfile.REGTYPE else b""
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.mark.parametrize("names", [["lib/y.so"], ["lib/x.so", "lib/y.so"],
+                                   ["lib/y.so", "lib/v.so"]])
+def test_tar_hard_link_resolved(tmp_path: Path, names: list[str]) -> None:
+    """Жёсткая ссылка в tar хешируется по содержимому своей цели."""
+    archive = _make_tar_with_links(tmp_path / "b.tar")
+    entries = [FileEntry(Path(f"{archive}!", name), algo, expected)
+               for name in names
+               for algo, expected in ((HashAlgo.MD5, HELLO_MD5),
+                                      (HashAlgo.CRC32, HELLO_CRC32))]
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.ok == result.total == len(entries)
+
+
+def test_tar_links_and_dirs_messages(tmp_path: Path) -> None:
+    """Каталог, символьная ссылка и ссылка без цели — свои сообщения об ошибке."""
+    archive = _make_tar_with_links(tmp_path / "b.tar")
+    entries = [FileEntry(Path(f"{archive}!", name), HashAlgo.MD5, HELLO_MD5)
+               for name in ("lib", "lib/z.so", "lib/w.so")]
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert {e.path.name: err.message for e, err in result.read_errors} == {
+        "lib": "Указан каталог вместо файла",
+        "z.so": "Ссылка в архиве не поддерживается",
+        "w.so": "Файл не найден в архиве",
+    }
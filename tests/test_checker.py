@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import hashlib
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.checker import check_entries
+from file_hash_validator.hashing import SMALL_FILE_THRESHOLD, calculate
+from file_hash_validator.models import FileEntry, HashAlgo
+
+
+def _make_tree(tmp_path: Path) -> list[FileEntry]:
+    """Много маленьких файлов в нескольких каталогах плюс ошибки."""
+    entries = []
+    for d in range(3):
+        directory = tmp_path / f"d{d}"
+        directory.mkdir()
+        for i in range(50):
+            data = f"{d}-{i}".encode() * (i + 1)
+            p = directory / f"f{i}.txt"
+            p.write_bytes(data)
+            expected = hashlib.md5(data).hexdigest()
+            if i == 7:
+                expected = "0" * 32
+            entries.append(FileEntry(p, HashAlgo.MD5, expected))
+    entries.append(FileEntry(tmp_path / "d0" / "missing.txt", HashAlgo.MD5, "0" * 32))
+    entries.append(FileEntry(tmp_path / "d1", HashAlgo.MD5, "0" * 32))
+    return entries
+
+
+@pytest.mark.parametrize("workers, batch_size", [(2, 16), (4, 1), (3, 1000)])
+def test_check_entries_batched_matches_sequential(tmp_path: Path, workers: int,
+                                                  batch_size: int) -> None:
+    """Пакетная проверка в потоках даёт тот же результат, что и обычная."""
+    entries = _make_tree(tmp_path)
+
+    seq = check_entries(entries, progress_enabled=False)
+    par = check_entries(entries, progress_enabled=False, workers=workers,
+                        batch_size=batch_size)
+
+    assert (par.total, par.ok) == (seq.total, seq.ok) == (len(entries), 147)
+    assert [e for e, _ in par.mismatched] == [e for e, _ in seq.mismatched]
+    assert [str(err) for _, err in par.read_errors] == [
+        str(err) for _, err in seq.read_errors]
+
+
+def test_calculate_small_file_grown_after_fstat(tmp_path: Path) -> None:
+    """Если маленький файл вырос после fstat, дочитывается всё содержимое."""
+    p = tmp_path / "small.bin"
+    p.write_bytes(b"a" * 10)
+    data = b"a" * 10 + b"b" * (SMALL_FILE_THRESHOLD * 2)
+
+    def grow(st) -> None:
+        p.write_bytes(data)
+
+    assert calculate(p, HashAlgo.SHA256, on_open=grow, chunk_size=1000) == \
+        hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_check_entries_stop(tmp_path: Path, workers: int) -> None:
+    """После stop() новые записи не начинаются; total — число проверенных."""
+    entries = _make_tree(tmp_path)
+    seen: list[FileEntry] = []
+
+    result = check_entries(entries, progress_enabled=False, workers=workers,
+                           batch_size=4, stop=lambda: len(seen) >= 10,
+                           on_result=lambda entry, ok: seen.append(entry))
+
+    assert 10 <= result.total < len(entries)
+    assert result.total == len(seen)
+    assert result.ok + len(result.mismatched) + len(result.read_errors) == result.total
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_check_entries_preserve_order(tmp_path: Path, workers: int) -> None:
+    """С preserve_order записи проверяются в переданном порядке, а не по каталогам."""
+    entries = _make_tree(tmp_path)
+    # чередуем каталоги: d0/f0, d1/f0, d2/f0, d0/f1, ...
+    mixed = [entries[d * 50 + i] for i in range(50) for d in range(3)]
+    seen: list[FileEntry] = []
+
+    result = check_entries(mixed, progress_enabled=False, workers=workers,
+                           batch_size=4, preserve_order=True,
+                           on_result=lambda entry, ok: seen.append(entry))
+
+    assert result.total == len(mixed)
+    assert seen == mixed
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_check_entries_report_in_manifest_order(tmp_path: Path, workers: int) -> None:
+    """Ошибки и несовпадения перечисляются в порядке манифеста, а не заданий."""
+    entries = _make_tree(tmp_path)
+    archive = tmp_path / "bundle.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("a.txt", b"hello")
+    prefix = f"{archive}!"
+    # архив и ошибки вперемешку с файлами из разных каталогов
+    mixed = [
+        FileEntry(Path(prefix, "a.txt"), HashAlgo.MD5, "0" * 32),
+        entries[2 * 50 + 7],
+        entries[-1],
+        FileEntry(Path(prefix, "missing.txt"), HashAlgo.MD5, "0" * 32),
+        entries[7],
+        entries[-2],
+        entries[50 + 7],
+    ]
+
+    result = check_entries(mixed, progress_enabled=False, workers=workers,
+                           batch_size=1)
+
+    assert [e for e, _ in result.mismatched] == [mixed[0], mixed[1], mixed[4],
+                                                 mixed[6]]
+    assert [e for e, _ in result.read_errors] == [mixed[2], mixed[3], mixed[5]]
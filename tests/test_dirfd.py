@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.checker import check_entries
+from file_hash_validator.dirfd import DIR_FD_SUPPORTED, DirFdCache
+from file_hash_validator.models import FileEntry, HashAlgo
+
+
+@pytest.mark.skipif(not DIR_FD_SUPPORTED, reason="dir_fd не поддерживается")
+def test_dir_fd_cache_lru_eviction(tmp_path: Path) -> None:
+    """Кэш не должен держать открытыми больше max_open каталогов."""
+    dirs = []
+    for i in range(3):
+        d = tmp_path / f"d{i}"
+        d.mkdir()
+        dirs.append(d)
+
+    with DirFdCache(max_open=2) as cache:
+        fd0 = cache.get(dirs[0])
+        assert cache.get(dirs[0]) == fd0
+        cache.get(dirs[1])
+        cache.get(dirs[2])
+        assert len(cache) == 2
+    assert len(cache) == 0
+
+
+def test_dir_fd_cache_missing_dir(tmp_path: Path) -> None:
+    """Для несуществующего каталога возвращается None."""
+    with DirFdCache() as cache:
+        assert cache.get(tmp_path / "missing") is None
+
+
+def test_check_entries_many_dirs(tmp_path: Path) -> None:
+    """Проверка по нескольким каталогам при маленьком кэше дескрипторов."""
+    entries = []
+    for i in range(4):
+        d = tmp_path / f"d{i}"
+        d.mkdir()
+        (d / "hello.txt").write_bytes(b"hello")
+        entries.append(FileEntry(d / "hello.txt", HashAlgo.MD5,
+                                 "5d41402abc4b2a76b9719d911017c592"))
+    entries.append(FileEntry(tmp_path / "d0" / "missing.txt", HashAlgo.MD5,
+                             "5d41402abc4b2a76b9719d911017c592"))
+
+    result = check_entries(entries, progress_enabled=False, max_open_dirs=1)
+
+    assert result.total == 5
+    assert result.ok == 4
+    assert len(result.read_errors) == 1
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+import file_hash_validator
+from file_hash_validator.checker import check_entries
+from file_hash_validator.distributed import (
+    Coordinator,
+    _Channel,
+    coordinate,
+    parse_shard,
+    partition,
+    run_worker,
+    select_shard,
+    shard_of,
+)
+from file_hash_validator.models import FileEntry, HashAlgo
+
+SRC_DIR = Path(file_hash_validator.__file__).resolve().parents[1]
+
+
+def _make_tree(root: Path, n: int = 40) -> list[FileEntry]:
+    """Файлы в нескольких каталогах, одно несовпадение и один отсутствующий файл."""
+    entries = []
+    for i in range(n):
+        p = root / f"d{i % 4}" / f"f{i}.bin"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        data = f"payload {i}".encode() * (i + 1)
+        p.write_bytes(data)
+        expected = hashlib.sha256(data).hexdigest()
+        if i == 3:
+            expected = "0" * 64
+        entries.append(FileEntry(p, HashAlgo.SHA256, expected))
+    entries.append(FileEntry(root / "missing.bin", HashAlgo.SHA256, "0" * 64))
+    return entries
+
+
+def _summary(result) -> tuple:
+    return (result.total, result.ok,
+            sorted((str(e.path), actual) for e, actual in result.mismatched),
+            sorted((str(e.path), str(err)) for e, err in result.read_errors))
+
+
+@pytest.mark.parametrize("value, expected", [("1/1", (1, 1)), ("3/8", (3, 8))])
+def test_parse_shard(value: str, expected: tuple[int, int]) -> None:
+    """Разбор --shard i/n."""
+    assert parse_shard(value) == expected
+
+
+@pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "1", "a/b", "1/2/3"])
+def test_parse_shard_invalid(value: str) -> None:
+    """Номер шарда вне 1..n или неверный формат — ValueError."""
+    with pytest.raises(ValueError):
+        parse_shard(value)
+
+
+def test_shards_partition_entries(tmp_path: Path) -> None:
+    """Шарды не пересекаются и вместе покрывают весь манифест."""
+    entries = _make_tree(tmp_path)
+    shards = [select_shard(entries, i, 4, tmp_path) for i in range(1, 5)]
+    assert sorted(map(str, (e.path for s in shards for e in s))) == \
+        sorted(str(e.path) for e in entries)
+    assert shards == partition(entries, 4, tmp_path)
+    assert sum(1 for s in shards if s) > 1
+
+
+def test_shard_independent_of_workdir(tmp_path: Path) -> None:
+    """Шард считается по пути относительно workdir: одинаков на разных узлах."""
+    a = FileEntry(tmp_path / "node1" / "x" / "y.txt", HashAlgo.MD5, "0")
+    b = FileEntry(tmp_path / "node2" / "x" / "y.txt", HashAlgo.MD5, "0")
+    for count in (2, 3, 7, 16):
+        assert shard_of(a, count, tmp_path / "node1") == \
+            shard_of(b, count, tmp_path / "node2")
+
+
+def test_archive_members_share_shard(tmp_path: Path) -> None:
+    """Все члены архива попадают в шард архива."""
+    members = [FileEntry(tmp_path / "bundle.tar!" / f"m{i}", HashAlgo.MD5, "0")
+               for i in range(20)]
+    archive = FileEntry(tmp_path / "bundle.tar", HashAlgo.MD5, "0")
+    assert {shard_of(e, 8, tmp_path) for e in members} == \
+        {shard_of(archive, 8, tmp_path)}
+
+
+def test_coordinate_with_worker_processes(tmp_path: Path,
+                                          monkeypatch: pytest.MonkeyPatch) -> None:
+    """Несколько процессов-воркеров дают тот же результат, что и локальная проверка."""
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(
+        filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")])))
+    entries = _make_tree(tmp_path)
+
+    result = coordinate(entries, workdir=tmp_path, processes=3, shards=8)
+
+    expected = check_entries(entries, progress_enabled=False)
+    assert _summary(result) == _summary(expected)
+    assert result.total == len(entries)
+    assert [e for e, _ in result.read_errors][0].path.name == "missing.bin"
+    assert result.read_errors[0][1].is_not_found
+
+
+def _crashing_worker(address: tuple[str, int], token: str,
+                     got_task: threading.Event) -> None:
+    """Воркер, который берёт шард и отключается, не ответив."""
+    chan = _Channel(socket.create_connection(address))
+    try:
+        chan.send({"type": "hello", "token": token})
+        assert chan.recv()["type"] == "task"
+        got_task.set()
+    finally:
+        chan.close()
+
+
+def test_coordinator_requeues_shard_of_dead_worker(tmp_path: Path) -> None:
+    """Шард отключившегося воркера перевыдаётся другому."""
+    entries = _make_tree(tmp_path)
+    got_task = threading.Event()
+
+    with Coordinator(entries, shards=4, workdir=tmp_path) as coord:
+        crasher = threading.Thread(target=_crashing_worker,
+                                   args=(coord.address, coord.token, got_task))
+        crasher.start()
+        result_box = []
+        served = threading.Thread(target=lambda: result_box.append(coord.serve()))
+        served.start()
+        assert got_task.wait(10)
+        crasher.join()
+        assert run_worker(coord.address, coord.token,
+                          workdir=tmp_path) == coord.shard_count
+        served.join(10)
+
+    expected = check_entries(entries, progress_enabled=False)
+    assert _summary(result_box[0]) == _summary(expected)
+
+
+def test_coordinator_gives_up_after_attempts(tmp_path: Path) -> None:
+    """После max_attempts неудач записи шарда считаются непроверенными."""
+    entries = _make_tree(tmp_path, n=5)
+
+    with Coordinator(entries, shards=1, workdir=tmp_path, max_attempts=2) as coord:
+        result_box = []
+        served = threading.Thread(target=lambda: result_box.append(coord.serve()))
+        served.start()
+        for _ in range(2):
+            got_task = threading.Event()
+            _crashing_worker(coord.address, coord.token, got_task)
+            assert got_task.is_set()
+        served.join(10)
+
+    result = result_box[0]
+    assert result.total == len(entries)
+    assert result.ok == 0
+    assert len(result.read_errors) == len(entries)
+
+
+@pytest.mark.parametrize("hello", [None, {"type": "hello", "token": "wrong"},
+                                   {"type": "hello"}])
+def test_coordinator_rejects_unauthenticated(tmp_path: Path, hello) -> None:
+    """Без верного секрета воркер не получает заданий, а его ответ не принимается."""
+    entries = _make_tree(tmp_path, n=5)
+
+    with Coordinator(entries, shards=2, workdir=tmp_path) as coord:
+        result_box = []
+        served = threading.Thread(target=lambda: result_box.append(coord.serve()))
+        served.start()
+
+        chan = _Channel(socket.create_connection(coord.address))
+        try:
+            if hello is not None:
+                chan.send(hello)
+            # подделанный результат без задания
+            chan.send({"type": "result", "shard": 0, "total": 5, "ok": 5,
+                       "sampled": 0, "mismatched": [], "read_errors": []})
+            assert chan.recv() is None
+        except ConnectionResetError:
+            pass
+        finally:
+            chan.close()
+
+        run_worker(coord.address, coord.token, workdir=tmp_path)
+        served.join(10)
+
+    expected = check_entries(entries, progress_enabled=False)
+    assert _summary(result_box[0]) == _summary(expected)
+
+
+def test_worker_resolves_paths_against_own_workdir(tmp_path: Path) -> None:
+    """Пути в заданиях относительны: воркер с другой точкой монтирования их находит."""
+    entries = _make_tree(tmp_path / "node1", n=8)
+    (tmp_path / "node1").rename(tmp_path / "node2")
+
+    with Coordinator(entries, shards=2, workdir=tmp_path / "node1") as coord:
+        result_box = []
+        served = threading.Thread(target=lambda: result_box.append(coord.serve()))
+        served.start()
+        run_worker(coord.address, coord.token, workdir=tmp_path / "node2")
+        served.join(10)
+
+    result = result_box[0]
+    assert result.total == len(entries)
+    assert result.ok == len(entries) - 2
+    # в отчёте координатора — его собственные записи
+    assert {e.path for e, _ in result.mismatched} <= {e.path for e in entries}
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+import io
 import os
 import stat
 from pathlib import Path
 
 import pytest
 
-from file_hash_validator.hashing import HashingError, calculate
+from file_hash_validator.dirfd import DIR_FD_SUPPORTED
+from file_hash_validator.hashing import (
+    FADVISE_SUPPORTED,
+    HashingError,
+    _hash_small,
+    calculate,
+)
 from file_hash_validator.models import HashAlgo
 
 
@@ -97,3 +105,135 @@ def test_calculate_accepts_path_as_str(tmp_path: Path, algo: HashAlgo) -> None:
     result = calculate(str(f), algo)
     assert isinstance(result, str)
     assert result  # непустая строка
+
+
+@pytest.mark.skipif(not DIR_FD_SUPPORTED, reason="dir_fd не поддерживается")
+def test_calculate_with_dir_fd(tmp_path: Path) -> None:
+    """С dir_fd файл открывается относительно каталога, результат тот же."""
+    f = _write(tmp_path, "hello.txt", b"hello")
+    fd = os.open(tmp_path, os.O_RDONLY)
+    try:
+        assert calculate(f, HashAlgo.MD5, dir_fd=fd) == calculate(f, HashAlgo.MD5)
+
+        with pytest.raises(HashingError) as e:
+            calculate(tmp_path / "missing.bin", HashAlgo.MD5, dir_fd=fd)
+        assert "Файл не найден" in str(e.value)
+    finally:
+        os.close(fd)
+
+
+def test_calculate_single_open_without_stat(tmp_path: Path,
+                                             monkeypatch: pytest.MonkeyPatch) -> None:
+    """Файл открывается один раз, без stat() по пути; размер берётся из fstat."""
+    f = _write(tmp_path, "hello.txt", b"hello")
+    opened: list[object] = []
+    real_open = os.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return real_open(*args, **kwargs)
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError("stat() по пути не должен вызываться")
+
+    sizes: list[int] = []
+    monkeypatch.setattr(os, "open", counting_open)
+    monkeypatch.setattr(os, "stat", no_stat)
+
+    digest = calculate(f, HashAlgo.MD5, on_open=lambda st: sizes.append(st.st_size))
+
+    assert digest == "5d41402abc4b2a76b9719d911017c592"
+    assert len(opened) == 1
+    assert sizes == [5]
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="нет FIFO на платформе")
+def test_calculate_special_file(tmp_path: Path) -> None:
+    """FIFO не блокирует чтение, а даёт HashingError."""
+    fifo = tmp_path / "pipe"
+    os.mkfifo(fifo)
+
+    with pytest.raises(HashingError) as e:
+        calculate(fifo, HashAlgo.MD5)
+    assert "специальный файл" in str(e.value)
+
+
+@pytest.mark.skipif(not os.path.exists("/dev/null"), reason="нет /dev/null")
+def test_calculate_char_device() -> None:
+    """Символьное устройство хешируется, как обычный файл."""
+    assert calculate("/dev/null", HashAlgo.MD5) == "d41d8cd98f00b204e9800998ecf8427e"
+
+
+def test_calculate_unsearchable_dir(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """EACCES на каталоге по пути — «Ошибка доступа к пути», а не «Нет прав»."""
+    f = _write(tmp_path, "file.bin", b"data")
+
+    def denied(*args, **kwargs):
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(os, "open", denied)
+    monkeypatch.setattr(os, "stat", denied)
+    with pytest.raises(HashingError) as e:
+        calculate(f, HashAlgo.MD5)
+    assert "Ошибка доступа к пути" in str(e.value)
+
+
+def test_calculate_unreadable_file(
+        tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """EACCES на существующем файле — «Нет прав на чтение файла»."""
+    f = _write(tmp_path, "file.bin", b"data")
+
+    def denied(*args, **kwargs):
+        raise PermissionError(13, "Permission denied")
+
+    monkeypatch.setattr(os, "open", denied)
+    with pytest.raises(HashingError) as e:
+        calculate(f, HashAlgo.MD5)
+    assert "Нет прав на чтение файла" in str(e.value)
+
+
+@pytest.mark.skipif(not FADVISE_SUPPORTED, reason="posix_fadvise недоступен")
+def test_calculate_no_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Режим no_cache даёт ту же сумму и сбрасывает прочитанное (DONTNEED)."""
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    f = _write(tmp_path, "big.bin", data)
+    advices: list[int] = []
+    real_fadvise = os.posix_fadvise
+
+    def recording_fadvise(fd, offset, length, advice):
+        advices.append(advice)
+        real_fadvise(fd, offset, length, advice)
+
+    monkeypatch.setattr("file_hash_validator.hashing.FADVISE_WINDOW", 1024 * 1024)
+    monkeypatch.setattr(os, "posix_fadvise", recording_fadvise)
+
+    assert calculate(f, HashAlgo.SHA256, no_cache=True, chunk_size=256 * 1024) == \
+        calculate(f, HashAlgo.SHA256)
+    assert advices[0] == os.POSIX_FADV_SEQUENTIAL
+    assert os.POSIX_FADV_WILLNEED in advices
+    assert advices.count(os.POSIX_FADV_DONTNEED) >= 3
+
+
+class _ShortReads(io.RawIOBase):
+    """Файл, который отдаёт не больше 3 байт за read(), как FUSE."""
+
+    def __init__(self, data: bytes) -> None:
+        self._buf = io.BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        chunk = self._buf.read(min(len(b), 3))
+        b[:len(chunk)] = chunk
+        return len(chunk)
+
+
+@pytest.mark.parametrize("extra", [b"", b"grown tail"])
+def test_hash_small_short_reads(extra: bytes) -> None:
+    """Короткие чтения не обрезают маленький файл."""
+    data = b"0123456789abcdef"
+    result = _hash_small(_ShortReads(data + extra), len(data), HashAlgo.MD5,
+                         chunk_size=4)
+    assert result == hashlib.md5(data + extra).hexdigest()
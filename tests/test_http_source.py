@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from file_hash_validator.checker import check_entries
+from file_hash_validator.hashing import HashingError
+from file_hash_validator.http_source import ConnectionPool, calculate_url
+from file_hash_validator.models import HashAlgo
+from file_hash_validator.parsers.common import parse_entry
+
+BIG = bytes(range(256)) * 1000  # 256000 байт
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Локальный HTTP-сервер с поддержкой Range и «сбойным» ресурсом."""
+    protocol_version = "HTTP/1.1"
+    files = {"/big.bin": BIG, "/hello.txt": b"hello", "/empty.bin": b""}
+    failures: dict[str, int] = {}
+    ranges = True
+    first_range_cap: int | None = None  # укороченный ответ на Range с нуля
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.path == "/redirect":
+            body = b"<html>moved</html>"
+            self.send_response(302)
+            self.send_header("Location", "/hello.txt")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        data = self.files.get(self.path.replace("/flaky", ""))
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        m = re.match(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if m and self.ranges:
+            start, end = int(m.group(1)), int(m.group(2))
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            end = min(end, len(data) - 1)
+            if start == 0 and self.first_range_cap is not None:
+                end = min(end, self.first_range_cap - 1)
+            body = data[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        else:
+            body = data
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture()
+def server() -> Iterator[str]:
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
+        _Handler.ranges = True
+        _Handler.failures = {}
+        _Handler.first_range_cap = None
+
+
+@pytest.mark.parametrize("ranges", [True, False])
+def test_calculate_url_segments(server: str, ranges: bool) -> None:
+    """Большой объект хешируется параллельными Range-запросами или потоком."""
+    _Handler.ranges = ranges
+    read: list[int] = []
+    with ConnectionPool() as pool:
+        digests = calculate_url(f"{server}/big.bin", [HashAlgo.MD5, HashAlgo.SHA256],
+                                pool=pool, segment_size=10_000, parallel=3,
+                                chunk_size=4096, on_read=read.append)
+
+    assert digests == [hashlib.md5(BIG).hexdigest(), hashlib.sha256(BIG).hexdigest()]
+    assert sum(read) == len(BIG)
+
+
+def test_calculate_url_short_first_range(server: str) -> None:
+    """Укороченный первый диапазон: сегменты продолжаются с его конца, без пропусков."""
+    _Handler.first_range_cap = 1234
+    with ConnectionPool() as pool:
+        digests = calculate_url(f"{server}/big.bin", [HashAlgo.SHA256], pool=pool,
+                                segment_size=10_000, parallel=2)
+    assert digests == [hashlib.sha256(BIG).hexdigest()]
+
+
+def test_calculate_url_empty_and_retry(server: str) -> None:
+    """Пустой ресурс (416 на Range) и временные 503 обрабатываются."""
+    _Handler.failures = {"/flaky/hello.txt": 2}
+    with ConnectionPool() as pool:
+        assert calculate_url(f"{server}/empty.bin", [HashAlgo.MD5], pool=pool) == [
+            hashlib.md5(b"").hexdigest()]
+        assert calculate_url(f"{server}/flaky/hello.txt", [HashAlgo.MD5],
+                             pool=pool) == [hashlib.md5(b"hello").hexdigest()]
+
+
+def test_calculate_url_not_found(server: str) -> None:
+    """404 даёт HashingError «Файл не найден»."""
+    with ConnectionPool() as pool, pytest.raises(HashingError) as e:
+        calculate_url(f"{server}/missing.bin", [HashAlgo.MD5], pool=pool)
+    assert e.value.is_not_found
+
+
+def test_calculate_url_redirect(server: str) -> None:
+    """Тело ответа 302 не хешируется как ресурс: HashingError с кодом."""
+    with ConnectionPool() as pool, pytest.raises(HashingError) as e:
+        calculate_url(f"{server}/redirect", [HashAlgo.MD5], pool=pool)
+    assert "Ошибка HTTP 302" in str(e.value)
+
+
+def test_check_entries_urls(server: str, tmp_path: Path) -> None:
+    """URL из манифеста сохраняется как есть и проверяется по HTTP."""
+    entries = [
+        parse_entry({"path": f"{server}/hello.txt", "hash_type": "md5",
+                     "hash": "5d41402abc4b2a76b9719d911017c592"}, tmp_path),
+        parse_entry({"path": f"{server}/missing.bin", "hash_type": "md5",
+                     "hash": "5d41402abc4b2a76b9719d911017c592"}, tmp_path),
+    ]
+    assert entries[0].source == f"{server}/hello.txt"
+
+    result = check_entries(entries, progress_enabled=False)
+
+    assert result.ok == 1
+    assert [e.source for e, _ in result.read_errors] == [f"{server}/missing.bin"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+import file_hash_validator.hashing as hashing
+from file_hash_validator.index import (
+    DigestIndex,
+    records_from_tree,
+    write_index,
+)
+from file_hash_validator.models import HashAlgo
+from file_hash_validator.parsers.common import ManifestValidationError
+
+HELLO_MD5 = "5d41402abc4b2a76b9719d911017c592"
+EMPTY_SHA256 = "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+
+
+def test_index_lookup_external_sort(tmp_path: Path) -> None:
+    """Индекс строится внешней сортировкой и ищется бинарным поиском."""
+    records = [(HashAlgo.MD5, f"{i:032x}", f"file{i}.bin") for i in range(500)]
+    records.append((HashAlgo.MD5, HELLO_MD5.upper(), "a/hello.txt"))
+    records.append((HashAlgo.MD5, HELLO_MD5, "b/hello\tcopy.txt"))
+    records.append((HashAlgo.CRC32, "abc", "c.bin"))
+
+    out = tmp_path / "digests.idx"
+    assert write_index(reversed(records), out, run_size=37) == len(records)
+
+    with DigestIndex(out) as index:
+        assert index.lookup(HashAlgo.MD5, HELLO_MD5) == [
+            "a/hello.txt", "b/hello\tcopy.txt"]
+        assert index.lookup(HashAlgo.MD5, f"{250:032x}") == ["file250.bin"]
+        assert index.lookup(HashAlgo.CRC32, "00000ABC") == ["c.bin"]
+        assert index.lookup(HashAlgo.MD5, "f" * 32) == []
+        assert index.lookup(HashAlgo.SHA256, EMPTY_SHA256) == []
+
+        with pytest.raises(ManifestValidationError):
+            index.lookup(HashAlgo.MD5, "xyz")
+
+    assert not list(tmp_path.glob(".index*"))
+
+
+def test_index_duplicates_from_tree(tmp_path: Path) -> None:
+    """Одинаковые файлы при обходе каталога попадают в одну группу."""
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_bytes(b"hello")
+    (root / "sub" / "b.txt").write_bytes(b"hello")
+    (root / "c.txt").write_bytes(b"other")
+
+    out = tmp_path / "digests.idx"
+    write_index(records_from_tree(root, [HashAlgo.MD5]), out)
+
+    with DigestIndex(out) as index:
+        dups = list(index.duplicates())
+
+    assert dups == [(HashAlgo.MD5, HELLO_MD5,
+                     [str(root / "a.txt"), str(root / "sub" / "b.txt")])]
+
+
+def test_index_empty(tmp_path: Path) -> None:
+    """Пустой индекс корректно открывается и ничего не находит."""
+    out = tmp_path / "empty.idx"
+    assert write_index([], out) == 0
+    with DigestIndex(out) as index:
+        assert index.lookup(HashAlgo.MD5, HELLO_MD5) == []
+        assert list(index.duplicates()) == []
+
+
+def test_index_rejects_other_files(tmp_path: Path) -> None:
+    """Файл без заголовка индекса не открывается как индекс."""
+    f = tmp_path / "not.idx"
+    f.write_text("md5\tabc\tpath\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        DigestIndex(f)
+
+
+def test_records_from_tree_reads_file_once(tmp_path: Path,
+                                           monkeypatch: pytest.MonkeyPatch) -> None:
+    """Несколько алгоритмов считаются за одно открытие файла."""
+    (tmp_path / "hello.txt").write_bytes(b"hello")
+    opened: list[Path] = []
+    real_open = hashing.open_for_hashing
+
+    def counting_open(path, dir_fd=None):
+        opened.append(path)
+        return real_open(path, dir_fd)
+
+    monkeypatch.setattr(hashing, "open_for_hashing", counting_open)
+    records = list(records_from_tree(tmp_path, [HashAlgo.MD5, HashAlgo.CRC32]))
+
+    assert records == [(HashAlgo.MD5, HELLO_MD5, str(tmp_path / "hello.txt")),
+                       (HashAlgo.CRC32, "3610a686", str(tmp_path / "hello.txt"))]
+    assert opened == [tmp_path / "hello.txt"]
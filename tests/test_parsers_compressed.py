@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import lzma
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from file_hash_validator.cli import main
+from file_hash_validator.parsers.common import (
+    ManifestError,
+    detect_compression,
+    manifest_format,
+)
+from file_hash_validator.parsers.json_parser import load_json_manifest
+from file_hash_validator.parsers.xml_parser import load_xml_manifest
+
+JSON_TEXT = """
+{"files": [{"path": "data/file1.txt", "hash_type": "md5",
+            "hash": "5d41402abc4b2a76b9719d911017c592"}]}
+"""
+
+XML_TEXT = """<?xml version="1.0" encoding="UTF-8"?>
+<files>
+  <file>
+    <path>data/file1.txt</path>
+    <hash_type>md5</hash_type>
+    <hash>5d41402abc4b2a76b9719d911017c592</hash>
+  </file>
+</files>
+"""
+
+COMPRESSORS: dict[str, tuple[str, Callable[[bytes], bytes]]] = {
+    "gzip": (".gz", gzip.compress),
+    "bz2": (".bz2", bz2.compress),
+    "xz": (".xz", lzma.compress),
+}
+
+
+def _write(tmp_path: Path, name: str, text: str,
+           compress: Callable[[bytes], bytes]) -> Path:
+    """Создаёт сжатый файл в tmp каталоге."""
+    p = tmp_path / name
+    p.write_bytes(compress(text.encode("utf-8")))
+    return p
+
+
+@pytest.mark.parametrize("compression", sorted(COMPRESSORS))
+def test_load_compressed_manifests(tmp_path: Path, compression: str) -> None:
+    """Сжатые JSON и XML манифесты читаются без распаковки на диск."""
+    suffix, compress = COMPRESSORS[compression]
+    json_path = _write(tmp_path, f"m.json{suffix}", JSON_TEXT, compress)
+    xml_path = _write(tmp_path, f"m.xml{suffix}", XML_TEXT, compress)
+
+    assert detect_compression(json_path) == compression
+    assert manifest_format(json_path) == "json"
+    assert manifest_format(xml_path) == "xml"
+
+    for entries in (load_json_manifest(json_path, workdir=tmp_path),
+                    load_xml_manifest(xml_path, workdir=tmp_path)):
+        assert len(entries) == 1
+        assert entries[0].path == tmp_path / "data" / "file1.txt"
+
+
+@pytest.mark.parametrize("name, text, compress, expected", [
+    ("manifest.dat", JSON_TEXT, gzip.compress, "json"),
+    ("manifest", XML_TEXT, lzma.compress, "xml"),
+    ("manifest.txt", "\ufeff  " + JSON_TEXT, lambda b: b, "json"),
+    ("manifest.bin", "plain text", bz2.compress, None),
+])
+def test_manifest_format_sniffed_by_content(tmp_path: Path, name: str, text: str,
+                                            compress: Callable[[bytes], bytes],
+                                            expected: str | None) -> None:
+    """При неизвестном расширении формат определяется по содержимому."""
+    assert manifest_format(_write(tmp_path, name, text, compress)) == expected
+
+
+def test_compression_detected_by_magic_not_suffix(tmp_path: Path) -> None:
+    """Несжатый файл с суффиксом .gz читается как обычный."""
+    p = _write(tmp_path, "m.json.gz", JSON_TEXT, lambda b: b)
+    assert detect_compression(p) is None
+    assert len(load_json_manifest(p, workdir=tmp_path)) == 1
+
+
+def test_truncated_compressed_manifest(tmp_path: Path) -> None:
+    """Обрезанный сжатый файл — ManifestError, а не необработанное исключение."""
+    for suffix, compress in COMPRESSORS.values():
+        data = compress(JSON_TEXT.encode("utf-8"))
+        p = tmp_path / f"m.json{suffix}"
+        p.write_bytes(data[:len(data) // 2])
+        with pytest.raises(ManifestError):
+            load_json_manifest(p, workdir=tmp_path)
+
+
+@pytest.mark.parametrize("name", ["bad.json.gz", "bad.dat"])
+def test_corrupt_gzip_manifest(tmp_path: Path, name: str,
+                               capsys: pytest.CaptureFixture[str]) -> None:
+    """Повреждённый gzip — ошибка манифеста и код 2 (и при определении формата)."""
+    data = bytearray(gzip.compress(JSON_TEXT.encode("utf-8")))
+    data[len(data) // 2] ^= 0xFF
+    p = tmp_path / name
+    p.write_bytes(bytes(data))
+
+    if name.endswith(".json.gz"):
+        with pytest.raises(ManifestError):
+            load_json_manifest(p, workdir=tmp_path)
+    else:
+        with pytest.raises(ManifestError):
+            manifest_format(p)
+    assert main([str(p), "--workdir", str(tmp_path), "--no-progress"]) == 2
+    assert "Ошибка манифеста" in capsys.readouterr().out
+
+
+def test_cli_checks_compressed_manifest(tmp_path: Path,
+                                        capsys: pytest.CaptureFixture[str]) -> None:
+    """CLI принимает сжатый манифест."""
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "file1.txt").write_bytes(b"hello")
+    p = _write(tmp_path, "m.xml.xz", XML_TEXT, lzma.compress)
+
+    assert main([str(p), "--workdir", str(tmp_path), "--no-progress"]) == 0
+    assert "Успешно: 1/1" in capsys.readouterr().out
+
+
+def test_manifests_without_lzma(tmp_path: Path) -> None:
+    """Без модуля lzma читаются обычные манифесты, а .xz — ошибка манифеста."""
+    plain = tmp_path / "m.json"
+    plain.write_text(JSON_TEXT, encoding="utf-8")
+    xz = _write(tmp_path, "m.json.xz", JSON_TEXT, lzma.compress)
+    code = f"""
+import sys
+sys.modules["lzma"] = None  # как в сборке Python без lzma
+from pathlib import Path
+from file_hash_validator.parsers.common import ManifestError
+from file_hash_validator.parsers.json_parser import load_json_manifest
+assert len(load_json_manifest(Path({str(plain)!r}), workdir=Path("."))) == 1
+try:
+    load_json_manifest(Path({str(xz)!r}), workdir=Path("."))
+except ManifestError as e:
+    print(e)
+"""
+    src = Path(__file__).resolve().parents[1] / "src"
+    env = {**os.environ, "PYTHONPATH": str(src)}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                         text=True, env=env, check=True)
+    assert "xz не поддерживается" in out.stdout
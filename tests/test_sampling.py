@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.checker import check_entries
+from file_hash_validator.hashing import calculate
+from file_hash_validator.models import HashAlgo
+from file_hash_validator.parsers.common import ManifestValidationError
+from file_hash_validator.parsers.json_parser import load_json_manifest
+from file_hash_validator.sampling import (
+    calculate_sample,
+    calculate_with_sample,
+    sample_offsets,
+)
+
+
+def _write(tmp_path: Path, name: str, data: bytes) -> Path:
+    """Функция для создания файла в tmp папке."""
+    p = tmp_path / name
+    p.write_bytes(data)
+    return p
+
+
+def test_sample_offsets_deterministic() -> None:
+    """Смещения фиксированы для размера: голова, хвост и случайные блоки."""
+    offsets = sample_offsets(10_000_000, 8, 4096)
+    assert offsets == sample_offsets(10_000_000, 8, 4096)
+    assert offsets[0] == 0
+    assert offsets[-1] == 10_000_000 - 4096
+    assert sample_offsets(100, 8, 4096) == [0]
+    assert sample_offsets(0, 8, 4096) == []
+
+
+@pytest.mark.parametrize("size", [0, 5, 4096 * 10, 300_001])
+def test_sample_single_pass_matches_sampled_read(tmp_path: Path, size: int) -> None:
+    """Выборка, собранная при полном чтении, совпадает с выборочным чтением."""
+    data = random.Random(size).randbytes(size)
+    f = _write(tmp_path, "data.bin", data)
+
+    full, sample = calculate_with_sample(f, HashAlgo.SHA256, blocks=4,
+                                         block_size=4096, chunk_size=1000)
+
+    assert full == calculate(f, HashAlgo.SHA256)
+    assert sample == calculate_sample(f, HashAlgo.SHA256, blocks=4, block_size=4096)
+
+
+@pytest.mark.skipif(not hasattr(os, "pread"), reason="нет os.pread")
+def test_sample_short_preads(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Короткие pread (FUSE, сетевые ФС) дочитываются до размера блока."""
+    f = _write(tmp_path, "data.bin", random.Random(1).randbytes(100_000))
+    expected = calculate_sample(f, HashAlgo.SHA256, blocks=4, block_size=4096)
+
+    real_pread = os.pread
+    monkeypatch.setattr(os, "pread", lambda fd, n, off: real_pread(fd, min(n, 3), off))
+
+    assert calculate_sample(f, HashAlgo.SHA256, blocks=4, block_size=4096) == expected
+
+
+def test_check_entries_quick(tmp_path: Path) -> None:
+    """--quick подтверждает по выборке, а при расхождении проверяет целиком."""
+    data = random.Random(1).randbytes(1_000_000)
+    good = _write(tmp_path, "good.bin", data)
+    bad = _write(tmp_path, "bad.bin", data)
+    deep = _write(tmp_path, "deep.bin", data)
+    digest, sample = calculate_with_sample(good, HashAlgo.MD5)
+
+    manifest = {"files": [
+        {"path": p.name, "hash_type": "md5", "hash": digest, "sample": str(sample)}
+        for p in (good, bad)
+    ] + [{"path": deep.name, "hash_type": "md5", "hash": digest,
+          "sample": str(sample), "deep": True}]}
+    manifest_path = tmp_path / "m.json"
+    manifest_path.write_text(json.dumps(manifest), encoding="utf-8")
+    entries = load_json_manifest(manifest_path, workdir=tmp_path)
+
+    with bad.open("r+b") as f:
+        f.write(b"X")  # голова файла входит в выборку
+
+    result = check_entries(entries, progress_enabled=False, quick=True)
+
+    assert result.ok == 2
+    assert result.sampled == 1
+    assert [e.path.name for e, _ in result.mismatched] == ["bad.bin"]
+
+
+def test_manifest_bad_sample(tmp_path: Path) -> None:
+    """Некорректное поле sample даёт ManifestValidationError."""
+    manifest_path = tmp_path / "m.json"
+    manifest_path.write_text(json.dumps({"files": [
+        {"path": "a", "hash_type": "md5",
+         "hash": "5d41402abc4b2a76b9719d911017c592", "sample": "zzz"}]}),
+        encoding="utf-8")
+
+    with pytest.raises(ManifestValidationError):
+        load_json_manifest(manifest_path, workdir=tmp_path)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.models import FileEntry, HashAlgo
+from file_hash_validator.scrub import (
+    ScrubStateError,
+    coverage_ages,
+    entry_key,
+    load_state,
+    order_by_staleness,
+    parse_duration,
+    scrub,
+)
+
+
+class FakeClock:
+    """
+    Часы, которые сдвигаются на 1 с при каждой проверке
+    (wall_clock вызывается именно тогда).
+    """
+
+    def __init__(self, wall: float) -> None:
+        self.ticks = 0
+        self.wall_time = wall
+
+    def clock(self) -> float:
+        return float(self.ticks)
+
+    def wall(self) -> float:
+        self.ticks += 1
+        return self.wall_time
+
+
+def _entries(tmp_path: Path, n: int) -> list[FileEntry]:
+    entries = []
+    for i in range(n):
+        p = tmp_path / f"f{i}.txt"
+        data = f"data {i}".encode()
+        p.write_bytes(data)
+        entries.append(FileEntry(p, HashAlgo.MD5, hashlib.md5(data).hexdigest()))
+    return entries
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2h", 7200), ("90m", 5400), ("1h30m", 5400), ("45s", 45), ("1d", 86400),
+    ("3600", 3600), ("0.5h", 1800),
+])
+def test_parse_duration(value: str, expected: float) -> None:
+    """Разбор длительности бюджета."""
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "abc", "2x", "0", "h2"])
+def test_parse_duration_invalid(value: str) -> None:
+    """Некорректная или нулевая длительность — ValueError."""
+    with pytest.raises(ValueError):
+        parse_duration(value)
+
+
+def test_scrub_budget_stops_and_resumes_stalest_first(tmp_path: Path) -> None:
+    """Бюджет сверяется перед каждой записью; следующий запуск продолжает с остатка."""
+    entries = _entries(tmp_path, 10)
+    state_path = tmp_path / "state.json"
+
+    # бюджет кончается на шестой записи
+    fake = FakeClock(1000.0)
+    report = scrub(entries, state_path, 4.5,
+                   clock=fake.clock, wall_clock=fake.wall)
+    assert report.result.total == 5
+    assert report.result.ok == 5
+    assert report.remaining == 5
+    assert report.never_verified == 5
+    assert set(load_state(state_path).verified) == {
+        entry_key(e) for e in entries[:5]}
+
+    fake = FakeClock(2000.0)
+    report = scrub(entries, state_path, 100,
+                   clock=fake.clock, wall_clock=fake.wall)
+    state = load_state(state_path)
+    assert report.remaining == 0
+    assert report.never_verified == 0
+    assert all(state.verified[entry_key(e)] == 2000.0 for e in entries)
+    assert report.ages == {50: 0.0, 90: 0.0, 99: 0.0, 100: 0.0}
+
+
+def test_scrub_order_and_pruning(tmp_path: Path) -> None:
+    """Сначала самые давние проверки; записи не из манифеста удаляются."""
+    entries = _entries(tmp_path, 3)
+    state_path = tmp_path / "state.json"
+    state_path.write_text(json.dumps({"version": 1, "entries": {
+        entry_key(entries[0]): 300.0,
+        entry_key(entries[1]): 100.0,
+        entry_key(entries[2]): 200.0,
+        "md5:/gone": 50.0,
+    }}), encoding="utf-8")
+
+    fake = FakeClock(1000.0)
+    report = scrub(entries, state_path, 0.5, clock=fake.clock,
+                   wall_clock=fake.wall)
+    assert report.result.total == 1
+    # состояние версии 1 читается, сохраняется уже в новом формате
+    assert load_state(state_path).verified == {
+        entry_key(entries[0]): 300.0,
+        entry_key(entries[1]): 1000.0,
+        entry_key(entries[2]): 200.0,
+    }
+
+
+def test_scrub_workers_single_pass(tmp_path: Path) -> None:
+    """С workers записи одного каталога проверяются пачками в потоках."""
+    entries = _entries(tmp_path, 20)
+    state_path = tmp_path / "state.json"
+
+    report = scrub(entries, state_path, 100, wall_clock=lambda: 7.0,
+                   workers=3, batch_size=4)
+    assert report.result.total == report.result.ok == 20
+    assert report.remaining == 0
+    assert load_state(state_path).verified == {entry_key(e): 7.0 for e in entries}
+
+
+def test_scrub_failures_stay_unverified(tmp_path: Path) -> None:
+    """Ошибки и несовпадения попадают в результат, но не отмечаются проверенными."""
+    entries = _entries(tmp_path, 2)
+    missing = FileEntry(tmp_path / "missing.txt", HashAlgo.MD5, "0" * 32)
+    corrupt = FileEntry(entries[0].path, HashAlgo.CRC32, "0" * 8)
+    entries += [missing, corrupt]
+    state_path = tmp_path / "state.json"
+
+    report = scrub(entries, state_path, 100, wall_clock=lambda: 5.0)
+    assert report.result.total == 4
+    assert report.result.ok == 2
+    assert len(report.result.read_errors) == 1
+    assert len(report.result.mismatched) == 1
+    assert report.never_verified == 2
+    state = load_state(state_path)
+    assert set(state.verified) == {entry_key(e) for e in entries[:2]}
+    assert set(state.attempted) == {entry_key(e) for e in entries}
+
+
+def test_scrub_failures_rotate(tmp_path: Path) -> None:
+    """Неудачная запись уходит в конец очереди и не съедает бюджет каждого запуска."""
+    missing = FileEntry(tmp_path / "missing.txt", HashAlgo.MD5, "0" * 32)
+    entries = [missing] + _entries(tmp_path, 4)
+    state_path = tmp_path / "state.json"
+
+    # по две записи за запуск
+    runs = []
+    for wall in (1000.0, 2000.0, 3000.0):
+        fake = FakeClock(wall)
+        runs.append(scrub(entries, state_path, 1.5, clock=fake.clock,
+                          wall_clock=fake.wall))
+
+    assert [len(r.result.read_errors) for r in runs] == [1, 0, 1]
+    assert [r.result.ok for r in runs] == [1, 2, 1]
+    assert runs[-1].never_verified == 1
+    state = load_state(state_path)
+    assert set(state.attempted) == {entry_key(e) for e in entries}
+    assert order_by_staleness(entries, state)[0] == entries[1]
+
+
+def test_coverage_ages_percentiles(tmp_path: Path) -> None:
+    """Перцентили давности проверки; непроверенные записи — None."""
+    entries = _entries(tmp_path, 10)
+    state = {entry_key(e): 100.0 - i for i, e in enumerate(entries[:9])}
+
+    ages = coverage_ages(entries, state, now=100.0)
+    assert ages[50] == 4.0
+    assert ages[90] == 8.0
+    assert ages[99] is None
+    assert ages[100] is None
+
+
+def test_scrub_bad_state(tmp_path: Path) -> None:
+    """Повреждённый файл состояния — ScrubStateError, файл не перезаписывается."""
+    state_path = tmp_path / "state.json"
+    state_path.write_text("{not json", encoding="utf-8")
+    with pytest.raises(ScrubStateError):
+        scrub(_entries(tmp_path, 1), state_path, 10)
+    assert state_path.read_text(encoding="utf-8") == "{not json"
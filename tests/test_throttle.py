@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from file_hash_validator.throttle import Throttle, TokenBucket, parse_rate, parse_size
+
+
+class FakeClock:
+    """Управляемые часы: sleep() просто сдвигает время."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, sec: float) -> None:
+        self.slept += sec
+        self.now += sec
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1000", 1000.0),
+    ("50M", 50 * 1024 ** 2),
+    ("1.5K", 1536.0),
+    ("2GiB/s", 2 * 1024 ** 3),
+    ("0", None),
+    ("none", None),
+])
+def test_parse_rate(value: str, expected) -> None:
+    """Лимиты разбираются с двоичными суффиксами, 0/none — без лимита."""
+    assert parse_rate(value) == expected
+
+
+@pytest.mark.parametrize("value", ["fast", "nan", "inf", "-inf", "1e400", "NaNM"])
+def test_parse_rate_invalid(value: str) -> None:
+    """Мусор и нечисловые (nan, inf) значения лимита дают ValueError."""
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("4096", 4096),
+    ("64K", 64 * 1024),
+    ("2MiB", 2 * 1024 ** 2),
+    ("1mb", 1024 ** 2),
+])
+def test_parse_size(value: str, expected: int) -> None:
+    """Размеры — целые байты с двоичными суффиксами."""
+    size = parse_size(value)
+    assert size == expected and isinstance(size, int)
+
+
+@pytest.mark.parametrize("value", ["", "0", "-1K", "1.5K", "64K/s", "K", "fast"])
+def test_parse_size_invalid(value: str) -> None:
+    """Дробные, нулевые, отрицательные размеры и скорости отклоняются."""
+    with pytest.raises(ValueError):
+        parse_size(value)
+
+
+def test_token_bucket_limits_rate() -> None:
+    """10 запросов по 100 при лимите 100/с должны занять ~10 секунд."""
+    clock = FakeClock()
+    bucket = TokenBucket(100, clock=clock, sleep=clock.sleep)
+
+    for _ in range(10):
+        bucket.consume(100)
+
+    assert clock.slept == pytest.approx(10.0)
+
+
+def test_token_bucket_unlimited() -> None:
+    """Без лимита consume() не спит."""
+    clock = FakeClock()
+    bucket = TokenBucket(None, clock=clock, sleep=clock.sleep)
+    bucket.consume(10 ** 9)
+    assert clock.slept == 0
+
+
+def test_throttle_control_file(tmp_path: Path) -> None:
+    """Лимиты подхватываются из файла управления и меняются на лету."""
+    control = tmp_path / "throttle.conf"
+    control.write_text("max_bandwidth = 10M\nmax_files_per_sec = 5\n",
+                       encoding="utf-8")
+    clock = FakeClock()
+    throttle = Throttle(control_file=control, clock=clock, sleep=clock.sleep)
+
+    assert throttle.bandwidth.rate == 10 * 1024 ** 2
+    assert throttle.files.rate == 5
+
+    control.write_text("max_bandwidth = none\n", encoding="utf-8")
+    os.utime(control, (1, 1))
+    throttle.request_reload()
+    throttle.file_opened()
+
+    assert throttle.bandwidth.rate is None
+    assert throttle.files.rate == 5
+
+
+def test_throttle_share(tmp_path: Path) -> None:
+    """С share лимиты (и из аргументов, и из файла управления) делятся на процессы."""
+    throttle = Throttle(40.0, 8.0, share=4)
+    assert throttle.bandwidth.rate == 10.0
+    assert throttle.files.rate == 2.0
+
+    control = tmp_path / "throttle.conf"
+    control.write_text("max_bandwidth = 4K\n", encoding="utf-8")
+    throttle = Throttle(control_file=control, share=4)
+    assert throttle.bandwidth.rate == 1024
+    assert throttle.files.rate is None
+
+
+def test_throttle_reload_while_reading(tmp_path: Path) -> None:
+    """Изменение файла управления применяется между чанками одного файла."""
+    control = tmp_path / "throttle.conf"
+    control.write_text("max_bandwidth = 10M\n", encoding="utf-8")
+    clock = FakeClock()
+    throttle = Throttle(control_file=control, clock=clock, sleep=clock.sleep)
+    throttle.file_opened()
+
+    control.write_text("max_bandwidth = 1M\n", encoding="utf-8")
+    os.utime(control, (1, 1))
+    clock.now += 2  # прошёл интервал опроса mtime
+    throttle.bytes_read_chunk(1024)
+
+    assert throttle.bandwidth.rate == 1024 ** 2
+
+
+def test_throttle_throughput_recent_window() -> None:
+    """Скорость считается за последние секунды, а не с начала работы."""
+    clock = FakeClock()
+    throttle = Throttle(clock=clock, sleep=clock.sleep)
+
+    # час по 100M/с, затем лимит снижен и читаем по 10M/с
+    for _ in range(3600):
+        clock.now += 1
+        throttle.bytes_read_chunk(100 * 1024 ** 2)
+    for _ in range(30):
+        clock.now += 1
+        throttle.bytes_read_chunk(10 * 1024 ** 2)
+
+    bps, _ = throttle.throughput()
+    assert bps == pytest.approx(10 * 1024 ** 2)